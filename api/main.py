@@ -4,6 +4,7 @@ import asyncio
 import logging
 import time
 import sys
+import threading
 from typing import Optional
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session #type: ignore
@@ -54,17 +55,38 @@ def get_redis():
             return None
     return redis_client
 
-def get_rabbit_channel():
+def read_job_status(r, job_id: str) -> Optional[dict]:
     """
-    Get RabbitMQ channel for publishing - create fresh connection each time.
+    Fetch a job's status fields, or None if the job is unknown. Statuses are
+    hashes; keys written as JSON strings before the switch are still read.
+    """
+    try:
+        data = r.hgetall(job_id)
+    except redis.ResponseError:
+        data = r.get(job_id)
+        return json.loads(data) if data else None
+    return data or None
+
+def replace_job_status(r, job_id: str, status: dict) -> None:
+    """
+    Overwrite a job's status hash with `status` in one transaction.
+    """
+    pipe = r.pipeline()
+    pipe.delete(job_id)
+    pipe.hset(job_id, mapping=status)
+    pipe.execute()
+
+def get_rabbit_channel(heartbeat: int = 0, connection_attempts: int = 5):
+    """
+    Open a new RabbitMQ connection and channel with the scripts queue declared.
     """
     try:
         logger.info("Creating fresh RabbitMQ connection")
         
         connection_params = pika.URLParameters(RABBIT_URL)
-        connection_params.heartbeat = 0
+        connection_params.heartbeat = heartbeat
         connection_params.blocked_connection_timeout = 30
-        connection_params.connection_attempts = 5
+        connection_params.connection_attempts = connection_attempts
         connection_params.retry_delay = 1
         connection_params.socket_timeout = 10
         
@@ -80,6 +102,83 @@ def get_rabbit_channel():
         logger.error(f"Failed to create RabbitMQ connection: {e}")
         raise
 
+class PromptPublisher:
+    """
+    Long-lived publisher for the scripts queue.
+
+    Holds one connection/channel across requests so a submission costs a single
+    basic_publish instead of a TCP + AMQP handshake and queue declare. Publisher
+    confirms and heartbeats make a silently dropped connection raise instead of
+    losing the message; it is then dropped and reconnected with exponential
+    backoff, bounded by max_publish_time.
+    """
+
+    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0,
+                 heartbeat: int = 30, max_publish_time: float = 15.0):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.heartbeat = heartbeat
+        self.max_publish_time = max_publish_time
+        self._conn = None
+        self._ch = None
+        # pika's BlockingConnection is not thread-safe and sync routes run in a threadpool
+        self._lock = threading.Lock()
+
+    def _ensure_channel(self):
+        if self._conn is None or self._conn.is_closed or self._ch is None or self._ch.is_closed:
+            self._reset()
+            # Single attempt per reconnect; publish() owns the retry/backoff budget
+            self._conn, self._ch = get_rabbit_channel(heartbeat=self.heartbeat, connection_attempts=1)
+            self._ch.confirm_delivery()
+        return self._ch
+
+    def _reset(self):
+        try:
+            if self._conn is not None and self._conn.is_open:
+                self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+        self._ch = None
+
+    def connect(self):
+        """Open the publisher connection eagerly."""
+        with self._lock:
+            self._ensure_channel()
+
+    def publish(self, body: str):
+        """Publish a persistent message to the scripts queue, reconnecting on failure."""
+        deadline = time.monotonic() + self.max_publish_time
+        for attempt in range(self.max_retries):
+            with self._lock:
+                try:
+                    # With confirms enabled this blocks until the broker acks and
+                    # raises on nack, unroutable or lost connections
+                    self._ensure_channel().basic_publish(
+                        exchange="",
+                        routing_key=SCRIPTS_QUEUE,
+                        body=body,
+                        properties=pika.BasicProperties(delivery_mode=2),
+                        mandatory=True
+                    )
+                    return
+                except Exception as e:
+                    logger.error(f"RabbitMQ publish attempt {attempt + 1} failed: {e}")
+                    self._reset()
+                    error = e
+
+            # Back off without holding the lock so other requests are not stalled
+            delay = self.retry_delay * (2 ** attempt)
+            if attempt == self.max_retries - 1 or time.monotonic() + delay >= deadline:
+                raise error
+            time.sleep(delay)
+
+    def close(self):
+        with self._lock:
+            self._reset()
+
+prompt_publisher = PromptPublisher()
+
 async def status_consumer():
     """
     Background task to consume status updates from RabbitMQ.
@@ -99,21 +198,16 @@ async def status_consumer():
             all_keys = r.keys("*")
             if all_keys is None:
                 all_keys = []
-            job_keys = [key for key in all_keys if not key.startswith("processed_session:")]
+            job_keys = [key for key in all_keys if not key.startswith(("processed_session:", "tts:"))]
             
             for job_key in job_keys:
                 if job_key in ["health", "status", "video_generation_count"]:
                     continue
                     
                 try:
-                    job_data = r.get(job_key)
-                    if not job_data:
+                    status_info = read_job_status(r, job_key)
+                    if not isinstance(status_info, dict):
                         continue
-                        
-                    if not isinstance(job_data, str):
-                        continue
-                        
-                    status_info = json.loads(job_data)
                     
                     if status_info.get("status") in ["done", "error"]:
                         continue
@@ -123,7 +217,7 @@ async def status_consumer():
                     if status_info.get("status") == "queued":
                         status_info["status"] = "rendering" 
                         status_info["progress"] = 0.3
-                        r.set(job_key, json.dumps(status_info))
+                        replace_job_status(r, job_key, status_info)
                         logger.info(f"Updated job {job_id} status to 'rendering'")
                         
                 except json.JSONDecodeError:
@@ -172,7 +266,7 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize video count: {e}")
     
     try:
-        get_rabbit_channel()
+        prompt_publisher.connect()
         logger.info("RabbitMQ connection established")
     except Exception as e:
         logger.warning(f"RabbitMQ connection failed: {e}")
@@ -193,6 +287,7 @@ async def lifespan(app: FastAPI):
             await status_consumer_task
         except asyncio.CancelledError:
             pass
+    prompt_publisher.close()
 
 app = FastAPI(
     title="Shorts-Generator API",
@@ -354,57 +449,26 @@ def submit_video(job: PromptJob, current_user: dict = Depends(get_current_user),
                 "user_sub": current_user.get("sub"),
                 "submitted_at": int(time.time())
             }
-            r.set(job.job_id, json.dumps(status_data))
+            replace_job_status(r, job.job_id, status_data)
             logger.info(f"Successfully stored initial status for job {job.job_id}")
         else:
             logger.warning("Redis not available, skipping status storage")
         
-        # Publish to RabbitMQ with retry logic
+        # Publish to RabbitMQ over the shared connection (retries internally)
         logger.info(f"Starting RabbitMQ publish for job {job.job_id}")
-        max_retries = 3
-        for attempt in range(max_retries):
-            connection = None
-            channel = None
-            try:
-                connection, channel = get_rabbit_channel()
-                
-                channel.basic_publish(
-                    exchange="",
-                    routing_key=SCRIPTS_QUEUE,
-                    body=job.model_dump_json(),
-                    properties=pika.BasicProperties(delivery_mode=2)
-                )
-                logger.info(f"Job {job.job_id} queued successfully")
-                
-                channel.close()
-                connection.close()
-                break
-                
-            except Exception as e:
-                logger.error(f"RabbitMQ publish attempt {attempt + 1} failed: {e}")
-                if channel:
-                    try:
-                        channel.close()
-                    except:
-                        pass
-                if connection:
-                    try:
-                        connection.close()
-                    except:
-                        pass
-                
-                if attempt == max_retries - 1:
-                    if r is not None:
-                        error_status = {
-                            "job_id": job.job_id,
-                            "status": "error",
-                            "error_msg": f"Failed to queue job after {max_retries} retries: {str(e)}"
-                        }
-                        r.set(job.job_id, json.dumps(error_status))
-                    logger.error(f"Final failure for job {job.job_id}: {e}")
-                    raise HTTPException(status_code=500, detail="Failed to queue job after retries")
-                
-                time.sleep(1)
+        try:
+            prompt_publisher.publish(job.model_dump_json())
+            logger.info(f"Job {job.job_id} queued successfully")
+        except Exception as e:
+            if r is not None:
+                error_status = {
+                    "job_id": job.job_id,
+                    "status": "error",
+                    "error_msg": f"Failed to queue job after {prompt_publisher.max_retries} retries: {str(e)}"
+                }
+                replace_job_status(r, job.job_id, error_status)
+            logger.error(f"Final failure for job {job.job_id}: {e}")
+            raise HTTPException(status_code=500, detail="Failed to queue job after retries")
         
         logger.info(f"Returning success response for job {job.job_id}")
         return VideoStatus(job_id=job.job_id, status="queued")
@@ -425,12 +489,11 @@ def get_video_status(job_id: str):
         if r is None:
             raise HTTPException(status_code=503, detail="Status service unavailable")
             
-        data = r.get(job_id)
+        status_info = read_job_status(r, job_id)
         
-        if not data:
+        if not status_info:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        status_info = json.loads(data)
         return VideoStatus(**status_info)
         
     except json.JSONDecodeError:
@@ -451,13 +514,12 @@ def download_video(job_id: str, db: Session = Depends(get_db)):
         status_from_redis = None
         
         if r is not None:
-            data = r.get(job_id)
-            if data:
-                try:
-                    status_info = json.loads(data)
+            try:
+                status_info = read_job_status(r, job_id)
+                if status_info:
                     status_from_redis = status_info.get("status")
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in Redis for job {job_id}")
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid JSON in Redis for job {job_id}")
         
         # If Redis doesn't have the data or status isn't "done", check the database
         if status_from_redis != "done":
@@ -525,9 +587,8 @@ def get_user_videos(current_user: dict = Depends(get_current_user), db: Session
             try:
                 r = get_redis()
                 if r is not None:
-                    redis_data = r.get(video.job_id)
-                    if redis_data:
-                        redis_status = json.loads(redis_data)
+                    redis_status = read_job_status(r, video.job_id)
+                    if redis_status:
                         current_status = redis_status.get("status", current_status)
                         if current_status == "done":
                             download_url = f"/api/videos/{video.job_id}/file"
@@ -0,0 +1,29 @@
+"""msgspec mirrors of the queue payloads for the per-message hot paths."""
+
+import msgspec # type: ignore
+
+
+class PromptJobMessage(msgspec.Struct):
+    """Wire form of PromptJob."""
+    job_id: str
+    prompt: str
+    character_theme: str = "rick_and_morty"
+    title: str | None = None
+
+class TurnMessage(msgspec.Struct):
+    """Wire form of Turn."""
+    speaker: str
+    text: str
+
+class DialogJobMessage(msgspec.Struct):
+    """Wire form of DialogJob."""
+    job_id: str
+    title: str
+    character_theme: str
+    turns: list[TurnMessage]
+
+
+# Typed decoders/encoder are built once; reusing them skips per-call setup
+prompt_job_decoder = msgspec.json.Decoder(PromptJobMessage)
+dialog_job_decoder = msgspec.json.Decoder(DialogJobMessage)
+json_encoder = msgspec.json.Encoder()
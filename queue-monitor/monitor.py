@@ -26,6 +26,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Workers register themselves as native hashes, listed in an index set
+WORKER_KEY_PREFIX = 'scaling_worker:'
+WORKER_INDEX_KEY = 'scaling_workers_index'
+
 @dataclass
 class QueueMetrics:
     """Metrics collected from queue and workers"""
@@ -111,19 +115,15 @@ class QueueMonitor:
             if not self.redis_client:
                 return 0
             
-            # Count active workers in Redis hash
-            workers = self.redis_client.hgetall('scaling_workers')
             active_count = 0
-            
-            for worker_id, worker_data_str in workers.items():
+            for worker_id, worker_data in self._load_worker_records():
                 try:
-                    worker_data = json.loads(worker_data_str)
                     if worker_data.get('status') == 'active':
                         # Check if worker is still alive (last_seen within 2 minutes)
                         last_seen = datetime.fromisoformat(worker_data.get('last_seen', ''))
                         if datetime.now() - last_seen < timedelta(minutes=2):
                             active_count += 1
-                except (json.JSONDecodeError, ValueError) as e:
+                except ValueError as e:
                     logger.warning(f"Invalid worker data for {worker_id}: {e}")
                     continue
             
@@ -133,24 +133,28 @@ class QueueMonitor:
             logger.error(f"Failed to get active workers: {e}")
             return 0
     
+    def _load_worker_records(self) -> list:
+        """Fetch every indexed worker hash in one round trip"""
+        worker_ids = list(self.redis_client.smembers(WORKER_INDEX_KEY))
+        if not worker_ids:
+            return []
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        for worker_id in worker_ids:
+            pipe.hgetall(f"{WORKER_KEY_PREFIX}{worker_id}")
+        return [(worker_id, data) for worker_id, data in zip(worker_ids, pipe.execute()) if data]
+    
     def get_healthy_workers(self) -> int:
         """Get count of healthy workers from Redis"""
         try:
             if not self.redis_client:
                 return 0
             
-            # Count healthy workers
-            workers = self.redis_client.hgetall('scaling_workers')
             healthy_count = 0
-            
-            for worker_id, worker_data_str in workers.items():
-                try:
-                    worker_data = json.loads(worker_data_str)
-                    if (worker_data.get('status') == 'active' and 
-                        worker_data.get('health_status') == 'healthy'):
-                        healthy_count += 1
-                except (json.JSONDecodeError, ValueError):
-                    continue
+            for _, worker_data in self._load_worker_records():
+                if (worker_data.get('status') == 'active' and 
+                    worker_data.get('health_status') == 'healthy'):
+                    healthy_count += 1
             
             return healthy_count
             
@@ -27,6 +27,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Workers register themselves as native hashes, listed in an index set
+WORKER_KEY_PREFIX = 'scaling_worker:'
+WORKER_INDEX_KEY = 'scaling_workers_index'
+
 class ScalingAction(Enum):
     """Scaling actions"""
     SCALE_UP = "scale_up"
@@ -508,29 +512,39 @@ class ScalingController:
             if not self.redis_client:
                 return []
             
-            workers_data = self.redis_client.hgetall('scaling_workers')
             workers = []
-            
-            for worker_id, worker_data_str in workers_data.items():
-                try:
-                    worker_data = json.loads(worker_data_str)
-                    workers.append({
-                        'worker_id': worker_id,
-                        'status': worker_data.get('status', 'unknown'),
-                        'health_status': worker_data.get('health_status', 'unknown'),
-                        'last_seen': worker_data.get('last_seen', ''),
-                        'current_job': worker_data.get('current_job'),
-                        'jobs_processed': worker_data.get('jobs_processed', 0),
-                        'jobs_failed': worker_data.get('jobs_failed', 0)
-                    })
-                except (json.JSONDecodeError, KeyError):
-                    continue
+            for worker_id, worker_data in self._load_worker_records():
+                workers.append({
+                    'worker_id': worker_id,
+                    'status': worker_data.get('status', 'unknown'),
+                    'health_status': worker_data.get('health_status', 'unknown'),
+                    'last_seen': worker_data.get('last_seen', ''),
+                    'current_job': worker_data.get('current_job') or None,
+                    'jobs_processed': int(worker_data.get('jobs_processed', 0)),
+                    'jobs_failed': int(worker_data.get('jobs_failed', 0))
+                })
             
             return workers
         except Exception as e:
             logger.error(f"Failed to get worker health: {e}")
             return []
     
+    def _load_worker_records(self) -> List[tuple]:
+        """Fetch every indexed worker hash in one round trip, pruning ids whose hash is gone"""
+        worker_ids = list(self.redis_client.smembers(WORKER_INDEX_KEY))
+        if not worker_ids:
+            return []
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        for worker_id in worker_ids:
+            pipe.hgetall(f"{WORKER_KEY_PREFIX}{worker_id}")
+        records = pipe.execute()
+        
+        stale = [worker_id for worker_id, data in zip(worker_ids, records) if not data]
+        if stale:
+            self.redis_client.srem(WORKER_INDEX_KEY, *stale)
+        return [(worker_id, data) for worker_id, data in zip(worker_ids, records) if data]
+    
     def _mark_worker_for_shutdown(self, worker_id: str):
         """Mark a worker for shutdown (stop accepting new jobs)"""
         try:
@@ -538,12 +552,12 @@ class ScalingController:
                 return
             
             # Update worker status in Redis
-            worker_data_str = self.redis_client.hget('scaling_workers', worker_id)
-            if worker_data_str:
-                worker_data = json.loads(worker_data_str)
-                worker_data['is_shutting_down'] = True
-                worker_data['shutdown_requested_at'] = datetime.now().isoformat()
-                self.redis_client.hset('scaling_workers', worker_id, json.dumps(worker_data))
+            worker_key = f"{WORKER_KEY_PREFIX}{worker_id}"
+            if self.redis_client.exists(worker_key):
+                self.redis_client.hset(worker_key, mapping={
+                    'is_shutting_down': 1,
+                    'shutdown_requested_at': datetime.now().isoformat()
+                })
                 logger.info(f"Marked worker {worker_id} for shutdown")
         except Exception as e:
             logger.error(f"Failed to mark worker {worker_id} for shutdown: {e}")
@@ -558,14 +572,13 @@ class ScalingController:
             for container in containers:
                 worker_id = container.name
                 try:
-                    worker_data_str = self.redis_client.hget('scaling_workers', worker_id)
-                    if worker_data_str:
-                        worker_data = json.loads(worker_data_str)
-                        current_job = worker_data.get('current_job')
-                        if current_job and current_job != 'None':
-                            all_jobs_complete = False
-                            logger.info(f"Worker {worker_id} still processing job: {current_job}")
-                            break
+                    current_job = self.redis_client.hget(f"{WORKER_KEY_PREFIX}{worker_id}", 'current_job')
+                    # Idle workers write '' now; 'None' is what workers
+                    # running the previous release still write
+                    if current_job and current_job != 'None':
+                        all_jobs_complete = False
+                        logger.info(f"Worker {worker_id} still processing job: {current_job}")
+                        break
                 except Exception as e:
                     logger.error(f"Error checking job status for {worker_id}: {e}")
             
@@ -595,7 +608,10 @@ class ScalingController:
                         
                         logger.info(f"Removing unhealthy worker: {worker['worker_id']}")
                         # Remove from Redis
-                        self.redis_client.hdel('scaling_workers', worker['worker_id'])
+                        pipe = self.redis_client.pipeline(transaction=False)
+                        pipe.delete(f"{WORKER_KEY_PREFIX}{worker['worker_id']}")
+                        pipe.srem(WORKER_INDEX_KEY, worker['worker_id'])
+                        pipe.execute()
                         
                         # In Docker Compose mode, try to remove the container
                         if self.deployment_mode == "compose":
@@ -663,7 +679,7 @@ class ScalingController:
             sys.path.append('/app/scaling-controller')
             from capacity_tracker import CapacityTracker
             
-            capacity_tracker = CapacityTracker(self.redis_url)
+            capacity_tracker = CapacityTracker(self.redis_url, redis_client=self.redis_client)
             if capacity_tracker.connect_redis():
                 cluster_capacity = capacity_tracker.calculate_cluster_capacity()
                 return cluster_capacity.get('capacity_utilization', 0.0)
@@ -680,7 +696,7 @@ class ScalingController:
             sys.path.append('/app/scaling-controller')
             from capacity_tracker import CapacityTracker
             
-            capacity_tracker = CapacityTracker(self.redis_url)
+            capacity_tracker = CapacityTracker(self.redis_url, redis_client=self.redis_client)
             if capacity_tracker.connect_redis():
                 removed = capacity_tracker.cleanup_stale_capacity_data()
                 if removed > 0:
@@ -7,17 +7,90 @@ to ensure jobs are not lost during scaling operations.
 """
 
 import os
-import json
+import orjson
 import time
 import redis
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Any
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 
 logger = logging.getLogger(__name__)
 
+# Compare-and-set for job state transitions. Validates the stored status and/or
+# owning worker, merges the changed fields into the stored state and updates the
+# worker assignment in a single round trip. Only the given fields are written, so
+# a concurrent heartbeat or retry bump is never overwritten by a stale snapshot.
+# Recovery retries and abandons jobs through the same checks, so a job that
+# finished or moved on after it was read is never resurrected or archived.
+# The started/heartbeat sorted sets index in-flight jobs by activity time so
+# recovery can ask for idle jobs directly instead of scanning every job.
+# KEYS: jobs hash, assignments hash, history list, started zset, heartbeat zset
+# ARGV: job_id, worker_id, allowed statuses (comma separated, '' = any),
+#       require_worker ('1'/'0'), changed fields JSON,
+#       op ('assign' / 'complete' / 'retry' / 'abandon' / ''), history length,
+#       started score ('' = unchanged), heartbeat score ('' = unchanged)
+# Returns 1 on success, 0 on a failed precondition, -1 if the job is missing.
+JOB_TRANSITION_LUA = """
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if not raw then
+    return -1
+end
+local state = cjson.decode(raw)
+if ARGV[3] ~= '' then
+    local allowed = false
+    for status in string.gmatch(ARGV[3], '[^,]+') do
+        if state['status'] == status then
+            allowed = true
+        end
+    end
+    if not allowed then
+        return 0
+    end
+end
+local worker = state['worker_id']
+if worker == nil or worker == cjson.null then
+    worker = ''
+end
+if ARGV[4] == '1' and worker ~= ARGV[2] then
+    return 0
+end
+for field, value in pairs(cjson.decode(ARGV[5])) do
+    state[field] = value
+end
+if ARGV[6] == 'retry' then
+    state['retry_count'] = (tonumber(state['retry_count']) or 0) + 1
+end
+local encoded = cjson.encode(state)
+local release = ARGV[6] == 'complete' or ARGV[6] == 'retry' or ARGV[6] == 'abandon'
+-- Leave the assignment alone if the worker has already moved on to another job
+if release and worker ~= '' and redis.call('HGET', KEYS[2], worker) == ARGV[1] then
+    redis.call('HDEL', KEYS[2], worker)
+end
+if release then
+    redis.call('ZREM', KEYS[4], ARGV[1])
+    redis.call('ZREM', KEYS[5], ARGV[1])
+end
+if ARGV[6] == 'complete' or ARGV[6] == 'abandon' then
+    redis.call('LPUSH', KEYS[3], encoded)
+    redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[7]) - 1)
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 1
+end
+redis.call('HSET', KEYS[1], ARGV[1], encoded)
+if ARGV[6] == 'assign' then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+end
+if ARGV[8] ~= '' then
+    redis.call('ZADD', KEYS[4], ARGV[8], ARGV[1])
+end
+if ARGV[9] ~= '' then
+    redis.call('ZADD', KEYS[5], ARGV[9], ARGV[1])
+end
+return 1
+"""
+
 class JobStatus(Enum):
     """Job status enumeration"""
     PENDING = "pending"
@@ -34,16 +107,42 @@ class JobState:
     job_id: str
     status: JobStatus
     worker_id: Optional[str]
-    assigned_at: Optional[datetime]
-    started_at: Optional[datetime]
-    completed_at: Optional[datetime]
+    assigned_at: Optional[int]  # epoch seconds
+    started_at: Optional[int]
+    completed_at: Optional[int]
     retry_count: int
     max_retries: int
     error_message: Optional[str]
     job_data: Dict[str, Any]
-    heartbeat_at: Optional[datetime]
+    heartbeat_at: Optional[int]
     estimated_duration: Optional[int]  # seconds
 
+def _compile_job_state_codecs():
+    """
+    Generate JobState <-> dict converters specialised to JobState's fixed field
+    set, so each call is a single constructor/dict literal with the enum
+    conversion inlined instead of asdict() plus a per-field loop.
+    """
+    load, dump = [], []
+    for name in (f.name for f in fields(JobState)):
+        if name == 'status':
+            load.append(f"{name}=JobStatus(d['{name}'])")
+            dump.append(f"'{name}': s.{name}.value")
+        else:
+            load.append(f"{name}=d['{name}']")
+            dump.append(f"'{name}': s.{name}")
+    source = (
+        "def dict_to_job_state(d):\n"
+        f"    return JobState({', '.join(load)})\n"
+        "def job_state_to_dict(s):\n"
+        f"    return {{{', '.join(dump)}}}\n"
+    )
+    namespace = {'JobState': JobState, 'JobStatus': JobStatus}
+    exec(source, namespace)
+    return namespace['dict_to_job_state'], namespace['job_state_to_dict']
+
+_dict_to_job_state, _job_state_to_dict = _compile_job_state_codecs()
+
 class JobManager:
     """
     Manages job state, tracking, and recovery for the auto-scaling system
@@ -52,22 +151,28 @@ class JobManager:
     def __init__(self, redis_url: str):
         self.redis_url = redis_url
         self.redis_client = None
+        self._transition_script = None
         
         # Configuration
         self.job_timeout = int(os.getenv("JOB_TIMEOUT", "3600"))  # 1 hour
         self.heartbeat_timeout = int(os.getenv("JOB_HEARTBEAT_TIMEOUT", "300"))  # 5 minutes
         self.max_retries = int(os.getenv("JOB_MAX_RETRIES", "3"))
+        self.scan_batch_size = int(os.getenv("JOB_SCAN_BATCH_SIZE", "500"))
+        self.history_size = 1000  # Keep last 1000 jobs
         
         # Redis keys
         self.jobs_key = "scaling_jobs"
         self.job_assignments_key = "job_assignments"
         self.job_history_key = "job_history"
+        self.job_started_key = "scaling_jobs_started"
+        self.job_heartbeats_key = "scaling_jobs_heartbeats"
         
     def connect_redis(self) -> bool:
         """Connect to Redis"""
         try:
-            self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+            self.redis_client = redis.from_url(self.redis_url)
             self.redis_client.ping()
+            self._transition_script = self.redis_client.register_script(JOB_TRANSITION_LUA)
             logger.info("Job Manager connected to Redis")
             return True
         except Exception as e:
@@ -97,7 +202,7 @@ class JobManager:
             
             # Store job state
             job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_id, json.dumps(job_state_dict))
+            self.redis_client.hset(self.jobs_key, job_id, orjson.dumps(job_state_dict))
             
             logger.info(f"Created job tracking for: {job_id}")
             return True
@@ -112,27 +217,19 @@ class JobManager:
             if not self.redis_client:
                 return False
             
-            job_state = self.get_job_state(job_id)
-            if not job_state:
+            # Update job state and track assignment atomically
+            result = self._transition_job(job_id, worker_id, {
+                'status': JobStatus.ASSIGNED,
+                'worker_id': worker_id,
+                'assigned_at': int(time.time()),
+            }, expected_statuses=(JobStatus.PENDING,), op='assign')
+            if result == -1:
                 logger.error(f"Job {job_id} not found")
                 return False
-            
-            if job_state.status != JobStatus.PENDING:
-                logger.warning(f"Job {job_id} is not in PENDING status: {job_state.status}")
+            if result != 1:
+                logger.warning(f"Job {job_id} is not in PENDING status")
                 return False
             
-            # Update job state
-            job_state.status = JobStatus.ASSIGNED
-            job_state.worker_id = worker_id
-            job_state.assigned_at = datetime.now()
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_id, json.dumps(job_state_dict))
-            
-            # Track assignment
-            self.redis_client.hset(self.job_assignments_key, worker_id, job_id)
-            
             logger.info(f"Assigned job {job_id} to worker {worker_id}")
             return True
             
@@ -146,24 +243,20 @@ class JobManager:
             if not self.redis_client:
                 return False
             
-            job_state = self.get_job_state(job_id)
-            if not job_state:
+            # Update job state if the job is still ours
+            now = int(time.time())
+            result = self._transition_job(job_id, worker_id, {
+                'status': JobStatus.PROCESSING,
+                'started_at': now,
+                'heartbeat_at': now,
+            }, require_worker=True)
+            if result == -1:
                 logger.error(f"Job {job_id} not found")
                 return False
-            
-            if job_state.worker_id != worker_id:
+            if result != 1:
                 logger.error(f"Job {job_id} is not assigned to worker {worker_id}")
                 return False
             
-            # Update job state
-            job_state.status = JobStatus.PROCESSING
-            job_state.started_at = datetime.now()
-            job_state.heartbeat_at = datetime.now()
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_id, json.dumps(job_state_dict))
-            
             logger.info(f"Started job {job_id} on worker {worker_id}")
             return True
             
@@ -177,20 +270,11 @@ class JobManager:
             if not self.redis_client:
                 return False
             
-            job_state = self.get_job_state(job_id)
-            if not job_state:
-                return False
-            
-            if job_state.worker_id != worker_id:
-                return False
-            
-            job_state.heartbeat_at = datetime.now()
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_id, json.dumps(job_state_dict))
-            
-            return True
+            # Only touch the heartbeat so a concurrent transition is never undone
+            result = self._transition_job(job_id, worker_id, {
+                'heartbeat_at': int(time.time()),
+            }, require_worker=True)
+            return result == 1
             
         except Exception as e:
             logger.error(f"Failed to update heartbeat for job {job_id}: {e}")
@@ -202,32 +286,22 @@ class JobManager:
             if not self.redis_client:
                 return False
             
-            job_state = self.get_job_state(job_id)
-            if not job_state:
+            # Release the assignment, move the job to history and drop it from
+            # the active set in one atomic step. Only an in-flight job can be
+            # completed, so a duplicate completion never archives it twice.
+            result = self._transition_job(job_id, worker_id, {
+                'status': JobStatus.COMPLETED if success else JobStatus.FAILED,
+                'completed_at': int(time.time()),
+                'error_message': error_message,
+            }, expected_statuses=(JobStatus.ASSIGNED, JobStatus.PROCESSING),
+               require_worker=True, op='complete')
+            if result == -1:
                 logger.error(f"Job {job_id} not found")
                 return False
-            
-            if job_state.worker_id != worker_id:
-                logger.error(f"Job {job_id} is not assigned to worker {worker_id}")
+            if result != 1:
+                logger.error(f"Job {job_id} is not in flight on worker {worker_id}")
                 return False
             
-            # Update job state
-            job_state.status = JobStatus.COMPLETED if success else JobStatus.FAILED
-            job_state.completed_at = datetime.now()
-            job_state.error_message = error_message
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_id, json.dumps(job_state_dict))
-            
-            # Remove from active assignments
-            self.redis_client.hdel(self.job_assignments_key, worker_id)
-            
-            # Move to history
-            self._archive_job(job_state)\n            
-            # Remove from active jobs
-            self.redis_client.hdel(self.jobs_key, job_id)
-            
             logger.info(f"Completed job {job_id} on worker {worker_id}: {'success' if success else 'failed'}")
             return True
             
@@ -245,7 +319,7 @@ class JobManager:
             if not job_state_str:
                 return None
             
-            job_state_dict = json.loads(job_state_str)
+            job_state_dict = orjson.loads(job_state_str)
             return self._dict_to_job_state(job_state_dict)
             
         except Exception as e:
@@ -258,19 +332,8 @@ class JobManager:
             if not self.redis_client:
                 return []
             
-            all_jobs = self.redis_client.hgetall(self.jobs_key)
-            worker_jobs = []
-            
-            for job_id, job_state_str in all_jobs.items():
-                try:
-                    job_state_dict = json.loads(job_state_str)
-                    job_state = self._dict_to_job_state(job_state_dict)
-                    if job_state.worker_id == worker_id:
-                        worker_jobs.append(job_state)
-                except Exception:
-                    continue
-            
-            return worker_jobs
+            return [job_state for job_state in self._iter_job_states()
+                    if job_state.worker_id == worker_id]
             
         except Exception as e:
             logger.error(f"Failed to get jobs for worker {worker_id}: {e}")
@@ -282,23 +345,48 @@ class JobManager:
             if not self.redis_client:
                 return []
             
-            all_jobs = self.redis_client.hgetall(self.jobs_key)
-            active_jobs = []
-            
-            for job_id, job_state_str in all_jobs.items():
-                try:
-                    job_state_dict = json.loads(job_state_str)
-                    job_state = self._dict_to_job_state(job_state_dict)
-                    active_jobs.append(job_state)
-                except Exception:
-                    continue
-            
-            return active_jobs
+            return list(self._iter_job_states())
             
         except Exception as e:
             logger.error(f"Failed to get active jobs: {e}")
             return []
     
+    def _iter_job_states(self) -> Iterator[JobState]:
+        """Stream job states with HSCAN so large hashes never load in one reply"""
+        # HSCAN may return a field more than once (e.g. while the hash rehashes)
+        seen = set()
+        for job_id, job_state_str in self.redis_client.hscan_iter(self.jobs_key, count=self.scan_batch_size):
+            if job_id in seen:
+                continue
+            seen.add(job_id)
+            try:
+                job_state_dict = orjson.loads(job_state_str)
+                yield self._dict_to_job_state(job_state_dict)
+            except Exception:
+                continue
+    
+    def _iter_job_batches(self, job_ids: List[str]) -> Iterator[List[JobState]]:
+        """Load the given jobs with HMGET in scan-sized batches"""
+        for i in range(0, len(job_ids), self.scan_batch_size):
+            batch_ids = job_ids[i:i + self.scan_batch_size]
+            batch = []
+            stale = []
+            for job_id, job_state_str in zip(batch_ids, self.redis_client.hmget(self.jobs_key, batch_ids)):
+                if not job_state_str:
+                    stale.append(job_id)
+                    continue
+                try:
+                    batch.append(self._dict_to_job_state(orjson.loads(job_state_str)))
+                except Exception:
+                    continue
+            if stale:
+                # Index entries left behind by jobs that are already gone
+                pipe = self.redis_client.pipeline()
+                self._unindex_job(pipe, *stale)
+                pipe.execute()
+            if batch:
+                yield batch
+    
     def recover_abandoned_jobs(self) -> int:
         """Recover jobs that were abandoned due to worker failures"""
         try:
@@ -306,35 +394,19 @@ class JobManager:
                 return 0
             
             recovered_count = 0
-            now = datetime.now()
-            
-            active_jobs = self.get_active_jobs()
-            
-            for job_state in active_jobs:
-                should_recover = False
-                
-                # Check for timeout
-                if job_state.started_at:
-                    job_duration = (now - job_state.started_at).total_seconds()
-                    if job_duration > self.job_timeout:
-                        should_recover = True
-                        logger.warning(f"Job {job_state.job_id} timed out after {job_duration} seconds")
-                
-                # Check for heartbeat timeout
-                if job_state.heartbeat_at:
-                    heartbeat_age = (now - job_state.heartbeat_at).total_seconds()
-                    if heartbeat_age > self.heartbeat_timeout:
-                        should_recover = True
-                        logger.warning(f"Job {job_state.job_id} heartbeat timeout: {heartbeat_age} seconds")
-                
-                if should_recover:
-                    if job_state.retry_count < job_state.max_retries:
-                        # Retry the job
-                        self._retry_job(job_state)
-                        recovered_count += 1
-                    else:
-                        # Mark as abandoned
-                        self._abandon_job(job_state)
+            now = int(time.time())
+            
+            # Only jobs idle past a timeout are candidates, so ask the activity
+            # indexes for them instead of scanning every active job
+            idle_jobs = set(self.redis_client.zrangebyscore(
+                self.job_started_key, '-inf', now - self.job_timeout))
+            idle_jobs.update(self.redis_client.zrangebyscore(
+                self.job_heartbeats_key, '-inf', now - self.heartbeat_timeout))
+            if not idle_jobs:
+                return 0
+            
+            for active_jobs in self._iter_job_batches(sorted(idle_jobs)):
+                recovered_count += self._recover_batch(active_jobs, now)
             
             if recovered_count > 0:
                 logger.info(f"Recovered {recovered_count} abandoned jobs")
@@ -345,88 +417,115 @@ class JobManager:
             logger.error(f"Failed to recover abandoned jobs: {e}")
             return 0
     
+    def _recover_batch(self, active_jobs: List[JobState], now: int) -> int:
+        """Retry or abandon the timed-out jobs in one batch"""
+        recovered_count = 0
+        
+        # Compute every job's age in one vectorized pass; missing timestamps
+        # become NaN and never compare greater than a timeout.
+        started = np.array([j.started_at for j in active_jobs], dtype=float)
+        heartbeats = np.array([j.heartbeat_at for j in active_jobs], dtype=float)
+        job_durations = now - started
+        heartbeat_ages = now - heartbeats
+        
+        timed_out = job_durations > self.job_timeout
+        heartbeat_expired = heartbeat_ages > self.heartbeat_timeout
+        
+        for i in np.nonzero(timed_out | heartbeat_expired)[0]:
+            job_state = active_jobs[i]
+            
+            if timed_out[i]:
+                logger.warning(f"Job {job_state.job_id} timed out after {job_durations[i]} seconds")
+            if heartbeat_expired[i]:
+                logger.warning(f"Job {job_state.job_id} heartbeat timeout: {heartbeat_ages[i]} seconds")
+            
+            if job_state.retry_count < job_state.max_retries:
+                # Retry the job
+                if self._retry_job(job_state):
+                    recovered_count += 1
+            else:
+                # Mark as abandoned
+                self._abandon_job(job_state)
+        
+        return recovered_count
+    
     def _retry_job(self, job_state: JobState):
         """Retry a failed job"""
         try:
-            job_state.status = JobStatus.RETRYING
-            job_state.worker_id = None
-            job_state.assigned_at = None
-            job_state.started_at = None
-            job_state.heartbeat_at = None
-            job_state.retry_count += 1
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_state.job_id, json.dumps(job_state_dict))
-            
-            # Remove from assignments
-            if job_state.worker_id:
-                self.redis_client.hdel(self.job_assignments_key, job_state.worker_id)
+            # Only retry the job as it was read; if it completed, restarted or
+            # moved worker since the scan, leave it be
+            result = self._transition_job(job_state.job_id, job_state.worker_id or '', {
+                'status': JobStatus.RETRYING,
+                'worker_id': None,
+                'assigned_at': None,
+                'started_at': None,
+                'heartbeat_at': None,
+            }, expected_statuses=(job_state.status,), require_worker=True, op='retry')
+            if result != 1:
+                logger.info(f"Job {job_state.job_id} changed since it timed out, not retrying")
+                return False
             
             # Re-queue the job (this would need integration with RabbitMQ)
-            logger.info(f"Retrying job {job_state.job_id} (attempt {job_state.retry_count})")
+            logger.info(f"Retrying job {job_state.job_id} (attempt {job_state.retry_count + 1})")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to retry job {job_state.job_id}: {e}")
+            return False
     
     def _abandon_job(self, job_state: JobState):
         """Mark a job as abandoned"""
         try:
-            job_state.status = JobStatus.ABANDONED
-            job_state.completed_at = datetime.now()
-            job_state.error_message = "Job abandoned due to repeated failures"
-            
-            # Store updated state
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.hset(self.jobs_key, job_state.job_id, json.dumps(job_state_dict))
-            
-            # Archive and remove
-            self._archive_job(job_state)
-            self.redis_client.hdel(self.jobs_key, job_state.job_id)
-            
-            if job_state.worker_id:
-                self.redis_client.hdel(self.job_assignments_key, job_state.worker_id)
+            # Archive and remove only if the job is still as it was read
+            result = self._transition_job(job_state.job_id, job_state.worker_id or '', {
+                'status': JobStatus.ABANDONED,
+                'completed_at': int(time.time()),
+                'error_message': "Job abandoned due to repeated failures",
+            }, expected_statuses=(job_state.status,), require_worker=True, op='abandon')
+            if result != 1:
+                logger.info(f"Job {job_state.job_id} changed since it timed out, not abandoning")
+                return
             
             logger.warning(f"Abandoned job {job_state.job_id} after {job_state.retry_count} retries")
             
         except Exception as e:
             logger.error(f"Failed to abandon job {job_state.job_id}: {e}")
     
-    def _archive_job(self, job_state: JobState):
-        """Archive completed job to history"""
-        try:
-            job_state_dict = self._job_state_to_dict(job_state)
-            self.redis_client.lpush(self.job_history_key, json.dumps(job_state_dict))
-            self.redis_client.ltrim(self.job_history_key, 0, 999)  # Keep last 1000 jobs
-            
-        except Exception as e:
-            logger.error(f"Failed to archive job {job_state.job_id}: {e}")
+    def _unindex_job(self, pipe, *job_ids: str):
+        """Queue removal of jobs from the activity indexes on a pipeline"""
+        pipe.zrem(self.job_started_key, *job_ids)
+        pipe.zrem(self.job_heartbeats_key, *job_ids)
     
-    def _job_state_to_dict(self, job_state: JobState) -> Dict[str, Any]:
-        """Convert JobState to dictionary for storage"""
-        result = asdict(job_state)
+    def _transition_job(self, job_id: str, worker_id: str, fields: Dict[str, Any],
+                        expected_statuses: tuple = (),
+                        require_worker: bool = False,
+                        op: str = '') -> int:
+        """Atomically merge fields into a job if the stored status/worker still match"""
+        started = fields.get('started_at')
+        heartbeat = fields.get('heartbeat_at')
+        changes = {field: value.value if isinstance(value, JobStatus) else value
+                   for field, value in fields.items()}
         
-        # Convert datetime objects to ISO strings
-        for field in ['assigned_at', 'started_at', 'completed_at', 'heartbeat_at']:
-            if result[field]:
-                result[field] = result[field].isoformat()
-        
-        # Convert enum to string
-        result['status'] = job_state.status.value
-        
-        return result
+        result = self._transition_script(
+            keys=[self.jobs_key, self.job_assignments_key, self.job_history_key,
+                  self.job_started_key, self.job_heartbeats_key],
+            args=[
+                job_id,
+                worker_id,
+                ','.join(status.value for status in expected_statuses),
+                '1' if require_worker else '0',
+                orjson.dumps(changes),
+                op,
+                self.history_size,
+                started if started is not None else '',
+                heartbeat if heartbeat is not None else '',
+            ],
+        )
+        return int(result)
     
-    def _dict_to_job_state(self, job_dict: Dict[str, Any]) -> JobState:
-        """Convert dictionary to JobState"""
-        # Convert ISO strings to datetime objects
-        for field in ['assigned_at', 'started_at', 'completed_at', 'heartbeat_at']:
-            if job_dict[field]:
-                job_dict[field] = datetime.fromisoformat(job_dict[field])
-        
-        # Convert string to enum
-        job_dict['status'] = JobStatus(job_dict['status'])
-        
-        return JobState(**job_dict)
+    # Generated at import by _compile_job_state_codecs
+    _job_state_to_dict = staticmethod(_job_state_to_dict)
+    _dict_to_job_state = staticmethod(_dict_to_job_state)
     
     def get_job_statistics(self) -> Dict[str, Any]:
         """Get job processing statistics"""
@@ -434,26 +533,28 @@ class JobManager:
             if not self.redis_client:
                 return {}
             
-            active_jobs = self.get_active_jobs()
+            # Aggregate in one streaming pass instead of materialising every job
+            counts = {status: 0 for status in JobStatus}
+            workers_with_jobs = set()
+            processing_times = []
+            now = int(time.time())
+            for job in self._iter_job_states():
+                counts[job.status] += 1
+                if job.worker_id:
+                    workers_with_jobs.add(job.worker_id)
+                if job.started_at and job.status == JobStatus.PROCESSING:
+                    processing_times.append(now - job.started_at)
             
             stats = {
-                'total_active_jobs': len(active_jobs),
-                'pending_jobs': len([j for j in active_jobs if j.status == JobStatus.PENDING]),
-                'assigned_jobs': len([j for j in active_jobs if j.status == JobStatus.ASSIGNED]),
-                'processing_jobs': len([j for j in active_jobs if j.status == JobStatus.PROCESSING]),
-                'retrying_jobs': len([j for j in active_jobs if j.status == JobStatus.RETRYING]),
-                'workers_with_jobs': len(set(j.worker_id for j in active_jobs if j.worker_id)),
+                'total_active_jobs': sum(counts.values()),
+                'pending_jobs': counts[JobStatus.PENDING],
+                'assigned_jobs': counts[JobStatus.ASSIGNED],
+                'processing_jobs': counts[JobStatus.PROCESSING],
+                'retrying_jobs': counts[JobStatus.RETRYING],
+                'workers_with_jobs': len(workers_with_jobs),
                 'average_processing_time': 0.0
             }
             
-            # Calculate average processing time for active jobs
-            processing_times = []
-            now = datetime.now()
-            for job in active_jobs:
-                if job.started_at and job.status == JobStatus.PROCESSING:
-                    processing_time = (now - job.started_at).total_seconds()
-                    processing_times.append(processing_time)
-            
             if processing_times:
                 stats['average_processing_time'] = sum(processing_times) / len(processing_times)
             
@@ -1,11 +1,56 @@
 """Configuration settings for the RabbitReels script generator service."""
 
 import os
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv # type: ignore
 
 load_dotenv()
 
-RABBIT_URL = os.getenv("RABBIT_URL")
-SCRIPTS_QUEUE = os.getenv("SCRIPTS_QUEUE", "scripts-queue")
-VIDEO_QUEUE = os.getenv("VIDEO_QUEUE", "video-queue")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Environment-derived settings, parsed and validated once at import."""
+    rabbit_url: Optional[str]
+    scripts_queue: str
+    video_queue: str
+    openai_api_key: Optional[str]
+    openai_max_connections: int
+    openai_keepalive_expiry: float
+    openai_max_retries: int
+    openai_timeout: float
+    openai_concurrency: int
+    prefetch_count: int
+    title_batch_size: int
+    title_batch_window_ms: int
+    redis_url: Optional[str]
+    llm_cache_enabled: bool
+    llm_cache_dialogs: bool
+    llm_cache_ttl: int
+    llm_title_cache_ttl: int
+
+    def __post_init__(self):
+        for name in ("openai_max_connections", "openai_concurrency", "prefetch_count", "title_batch_size"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name.upper()} must be at least 1")
+
+
+settings = Settings(
+    rabbit_url=os.getenv("RABBIT_URL"),
+    scripts_queue=os.getenv("SCRIPTS_QUEUE", "scripts-queue"),
+    video_queue=os.getenv("VIDEO_QUEUE", "video-queue"),
+    openai_api_key=os.getenv("OPENAI_API_KEY"),
+    openai_max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "64")),
+    openai_keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "120")),
+    openai_max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
+    openai_timeout=float(os.getenv("OPENAI_TIMEOUT", "30")),
+    openai_concurrency=int(os.getenv("OPENAI_CONCURRENCY", "16")),
+    prefetch_count=int(os.getenv("PREFETCH_COUNT", "32")),
+    title_batch_size=int(os.getenv("TITLE_BATCH_SIZE", "8")),
+    title_batch_window_ms=int(os.getenv("TITLE_BATCH_WINDOW_MS", "100")),
+    redis_url=os.getenv("REDIS_URL"),
+    llm_cache_enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+    llm_cache_dialogs=os.getenv("LLM_CACHE_DIALOGS", "false").lower() == "true",
+    llm_cache_ttl=int(os.getenv("LLM_CACHE_TTL", "86400")),
+    llm_title_cache_ttl=int(os.getenv("LLM_TITLE_CACHE_TTL", str(7 * 86400))),
+)
@@ -1,176 +1,534 @@
 """Script generator service for RabbitReels - creates dialog scripts from prompts."""
 
-import json
-import pika # type: ignore
-from openai import OpenAI # type: ignore
-from common.schemas import PromptJob, DialogJob, Turn
-from config import *
-
-client = OpenAI(api_key=OPENAI_API_KEY)
-
-CHARACTER_CONFIG = {
-    "family_guy": {
-        "char1_name": "stewie",
-        "char1_persona": "snarky and curious, asks probing questions",
-        "char2_name": "peter",
-        "char2_persona": "the dim-witted, though well-meaning and great explainer who does most of the teaching",
-        "starter": "stewie"
-    },
-    "rick_and_morty": {
-        "char1_name": "rick",
-        "char1_persona": "brilliant but cynical scientist who explains things condescendingly and calls Morty 'Morty' or 'dummy'",
-        "char2_name": "morty",
-        "char2_persona": "nervous, questioning teenager who asks lots of questions and stutters, addresses Rick as 'Rick' or 'Aw geez Rick'",
-        "starter": "morty"
+import asyncio
+import functools
+import hashlib
+import re
+from dataclasses import dataclass
+import msgspec # type: ignore
+import orjson # type: ignore
+import httpx # type: ignore
+import aio_pika # type: ignore
+import redis.asyncio as aioredis # type: ignore
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient # type: ignore
+from common.messages import (
+    PromptJobMessage, DialogJobMessage, TurnMessage,
+    prompt_job_decoder, json_encoder,
+)
+from config import settings
+
+# Shared keep-alive pool so every completion reuses the same TLS connections;
+# idle connections are kept for OPENAI_KEEPALIVE_EXPIRY so bursts after a quiet
+# spell don't pay a fresh handshake.
+# The SDK retries 429/5xx with exponential backoff on top of this transport.
+http_client = DefaultAsyncHttpxClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_connections,
+        keepalive_expiry=settings.openai_keepalive_expiry,
+    ),
+    timeout=settings.openai_timeout,
+)
+client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=http_client, max_retries=settings.openai_max_retries)
+
+MODEL = "gpt-4.1-nano"
+
+# Optional Redis cache for LLM responses, keyed on every input that shapes the output
+cache_client = aioredis.from_url(settings.redis_url) if settings.llm_cache_enabled and settings.redis_url else None
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_prompt(prompt_text: str) -> str:
+    """Fold case and spacing so trivially different prompts share a cache entry.
+
+    Punctuation is kept: "C++" and "C#", or "2+2" and "2-2", are different topics.
+    """
+    return _WHITESPACE.sub(" ", prompt_text.casefold()).strip()
+
+
+# Bump when the key derivation changes so entries stored under the old scheme are never read
+_CACHE_KEY_VERSION = 2
+
+
+def _llm_cache_key(kind: str, system_prompt: str, prompt_text: str, temperature: float) -> str:
+    """Hash everything that shapes a completion, so prompt edits invalidate old entries."""
+    digest = hashlib.sha256(
+        f"{_CACHE_KEY_VERSION}|{MODEL}|{temperature}|{system_prompt}|{_normalize_prompt(prompt_text)}".encode()
+    ).hexdigest()
+    return f"llm:{kind}:{digest}"
+
+
+async def _cache_get(key: str):
+    """Return the cached response for key, or None on a miss or Redis error."""
+    if cache_client is None:
+        return None
+    try:
+        cached = await cache_client.get(key)
+        return orjson.loads(cached) if cached else None
+    except Exception as e:
+        print(f"⚠️ LLM cache read failed: {e}")
+        return None
+
+
+async def _cache_set(key: str, value, ttl: int = settings.llm_cache_ttl) -> None:
+    if cache_client is None:
+        return
+    try:
+        await cache_client.set(key, orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        print(f"⚠️ LLM cache write failed: {e}")
+
+# Identical requests already in flight, so concurrent duplicates (retries,
+# repeated test prompts) share one OpenAI call instead of each making their own
+_inflight: dict[tuple, asyncio.Task] = {}
+
+
+def _coalesce(key: tuple, factory):
+    """Await the in-flight call for key, starting it with factory() if there is none."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller being cancelled doesn't cancel the others' result
+    return asyncio.shield(task)
+
+@dataclass(frozen=True, slots=True)
+class CharacterTheme:
+    """The two-character cast for one theme; char2 is the teacher."""
+    char1_name: str
+    char1_persona: str
+    char2_name: str
+    char2_persona: str
+    starter: str
+
+
+CHARACTER_CONFIG: dict[str, CharacterTheme] = {
+    "family_guy": CharacterTheme(
+        char1_name="stewie",
+        char1_persona="snarky and curious, asks probing questions",
+        char2_name="peter",
+        char2_persona="the dim-witted, though well-meaning and great explainer who does most of the teaching",
+        starter="stewie"
+    ),
+    "rick_and_morty": CharacterTheme(
+        char1_name="rick",
+        char1_persona="brilliant but cynical scientist who explains things condescendingly and calls Morty 'Morty' or 'dummy'",
+        char2_name="morty",
+        char2_persona="nervous, questioning teenager who asks lots of questions and stutters, addresses Rick as 'Rick' or 'Aw geez Rick'",
+        starter="morty"
+    )
+}
+
+
+# Static instructions come first and are byte-identical for every request so
+# OpenAI's prompt caching can reuse the prefix; everything that varies (cast,
+# topic) goes in the trailing user message.
+DIALOG_SYSTEM_PROMPT = (
+    "You are a scriptwriter for YouTube Shorts. Write a 30-second dialog between the two characters described in the request.\n"
+    "The dialog must alternate speakers, starting with the character the request names as the starter.\n"
+    "The teacher should do most of the explaining and teaching, while the other character asks questions or makes snarky comments.\n"
+    "You MUST return a valid JSON object. The root object must have a single key, 'dialog', which is a JSON array of turn objects.\n"
+    "Each turn object in the array MUST have exactly two keys: 'speaker' (string name - use EXACTLY one of the two character names from the request, in lowercase) and 'text' (string: the character's line)."
+)
+
+
+def _build_cast_brief(config: CharacterTheme) -> str:
+    """Render the per-theme character description sent ahead of the topic."""
+    char1, char2 = config.char1_name, config.char2_name
+    return (
+        f"Characters: '{char1}' and '{char2}'.\n"
+        f"{char1.title()} is {config.char1_persona}.\n"
+        f"{char2.title()} is {config.char2_persona}.\n"
+        f"Starter: {config.starter}. Teacher: {char2}."
+    )
+
+
+# Everything ahead of the topic only depends on the theme, so render it once at
+# import; per call only the topic is appended
+DIALOG_PROMPT_PREFIXES = {
+    theme: f"{_build_cast_brief(config)}\n\nCreate a dialog about: "
+    for theme, config in CHARACTER_CONFIG.items()
+}
+
+
+def _build_dialog_response_format(config: CharacterTheme) -> dict:
+    """Strict schema for {dialog: [{speaker, text}]}, with speakers limited to the theme's cast."""
+    turn = {
+        "type": "object",
+        "properties": {
+            "speaker": {"type": "string", "enum": [config.char1_name, config.char2_name]},
+            "text": {"type": "string"},
+        },
+        "required": ["speaker", "text"],
+        "additionalProperties": False,
     }
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "dialog",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"dialog": {"type": "array", "items": turn}},
+                "required": ["dialog"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+# Structured outputs make the server emit exactly this shape, so replies never
+# need repairing or regenerating
+DIALOG_RESPONSE_FORMATS = {
+    theme: _build_dialog_response_format(config)
+    for theme, config in CHARACTER_CONFIG.items()
 }
 
-def make_script(prompt_text: str) -> str:
+SCRIPT_SYSTEM_PROMPT = (
+    "You are a social-media-savvy educator creating ultra-concise YouTube Shorts scripts. "
+    "Each script must be around 30-40 seconds long, and follow a structure like:\n"
+    "1. Hook\n"
+    "2. Core Explanation (Go from basic to deep into at least one cool area of the topic and leave the beginner viewers feeling like a topic expert)\n"
+    "Use energetic, direct language; no fluff; end with a call to action and follow for more.\n"
+    "- Total length: 30-40 seconds\n"
+    "- Follow the structure given\n"
+    "- No bullet points"
+)
+
+TITLE_SYSTEM_PROMPT = (
+    "You are a YouTube Shorts title generator. "
+    "Produce a catchy, under-8-word title summarizing the topic."
+)
+
+# Greedy, seeded sampling keeps titles byte-stable for identical prompts, so
+# repeats are exact hits for both the Redis cache and OpenAI's prompt cache
+TITLE_SAMPLING = {"temperature": 0, "top_p": 1, "n": 1, "seed": 0}
+
+TITLE_BATCH_SYSTEM_PROMPT = (
+    "You are a YouTube Shorts title generator. "
+    "For each numbered topic, produce a catchy, under-8-word title summarizing it.\n"
+    "Return a JSON object with a single key, 'titles': an array of strings with exactly one title per topic, in the same order."
+)
+
+# Shared, never-mutated system messages reused by every request
+DIALOG_SYSTEM_MESSAGE = {"role": "system", "content": DIALOG_SYSTEM_PROMPT}
+SCRIPT_SYSTEM_MESSAGE = {"role": "system", "content": SCRIPT_SYSTEM_PROMPT}
+TITLE_SYSTEM_MESSAGE = {"role": "system", "content": TITLE_SYSTEM_PROMPT}
+TITLE_BATCH_SYSTEM_MESSAGE = {"role": "system", "content": TITLE_BATCH_SYSTEM_PROMPT}
+
+async def make_script(prompt_text: str) -> str:
     """Generate a YouTube Shorts script from a prompt."""
-    response = client.chat.completions.create(
-        model="gpt-4.1-nano",
+    cache_key = _llm_cache_key("script", SCRIPT_SYSTEM_PROMPT, prompt_text, 0.6)
+    cached = await _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = await client.chat.completions.create(
+        model=MODEL,
         messages=[
-            { "role": "system",
-              "content": (
-                  "You are a social-media-savvy educator creating ultra-concise YouTube Shorts scripts. "
-                  "Each script must be around 30-40 seconds long, and follow a structure like:\n"
-                  "1. Hook\n"
-                  "2. Core Explanation (Go from basic to deep into at least one cool area of the topic and leave the beginner viewers feeling like a topic expert)\n"
-                  "Use energetic, direct language; no fluff; end with a call to action and follow for more."
-              )
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Create a script for: **{prompt_text}**\n"
-                    "- Total length: 30-40 seconds\n"
-                    "- Follow the structure given\n"
-                    "- No bullet points"
-                )
-            }
+            SCRIPT_SYSTEM_MESSAGE,
+            {"role": "user", "content": f"Create a script for: **{prompt_text}**"}
         ],
         temperature=0.6,
-        max_tokens=250
+        max_tokens=180
     )
-    return response.choices[0].message.content.strip()
+    script = response.choices[0].message.content.strip()
+    await _cache_set(cache_key, script)
+    return script
 
 
-def make_dialog(prompt_text: str, theme: str) -> list[dict]:
+async def make_dialog(prompt_text: str, theme: str) -> list[dict]:
     """Return a list of {speaker,text} turns ~30 s total for a given theme."""
-    config = CHARACTER_CONFIG.get(theme)
-    if not config:
+    return await _coalesce(("dialog", theme, _normalize_prompt(prompt_text)), lambda: _make_dialog(prompt_text, theme))
+
+
+async def _make_dialog(prompt_text: str, theme: str) -> list[dict]:
+    if theme not in DIALOG_PROMPT_PREFIXES:
         raise ValueError(f"Invalid character theme: {theme}")
 
-    system_prompt = (
-        f"You are a scriptwriter for a YouTube Short. Write a 30-second dialog between {config['char1_name']} and {config['char2_name']}.\n"
-        f"{config['char1_name'].title()} is {config['char1_persona']}.\n"
-        f"{config['char2_name'].title()} is {config['char2_persona']}.\n"
-        f"The dialog must alternate speakers, starting with {config['starter']}.\n"
-        f"IMPORTANT: {config['char2_name'].title()} should do most of the explaining and teaching, while {config['char1_name']} asks questions or makes snarky comments.\n"
-        "You MUST return a valid JSON object. The root object must have a single key, 'dialog', which is a JSON array of turn objects.\n"
-        f"Each turn object in the array MUST have exactly two keys: 'speaker' (string name - use EXACTLY '{config['char1_name']}' or '{config['char2_name']}' in lowercase) and 'text' (string: the character's line)."
-    )
+    user_prompt = DIALOG_PROMPT_PREFIXES[theme] + prompt_text
+
+    # Dialogs are sampled for variety, so caching them is opt-in
+    cache_key = _llm_cache_key("dialog", DIALOG_SYSTEM_PROMPT, user_prompt, 0.7) if settings.llm_cache_dialogs else None
+    if cache_key:
+        cached = await _cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-    response = client.chat.completions.create(
-        model="gpt-4.1-nano",
-        response_format={"type": "json_object"}, # Enforce JSON mode
+    stream = await client.chat.completions.create(
+        model=MODEL,
+        response_format=DIALOG_RESPONSE_FORMATS[theme],
         messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Create a dialog about: {prompt_text}"}
+            DIALOG_SYSTEM_MESSAGE,
+            {"role": "user", "content": user_prompt}
         ],
         temperature=0.7,
-        max_tokens=400
+        max_tokens=400,
+        stream=True
     )
-    
+    turns_list = orjson.loads(await _read_dialog_stream(stream))["dialog"]
+
+    if cache_key:
+        await _cache_set(cache_key, turns_list)
+    return turns_list
+
+
+class _DialogScanner:
+    """
+    Tracks JSON nesting across streamed chunks to spot where the top-level
+    "dialog" array closes, so the reply can be used before the stream ends.
+    """
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str):
+        """Append chunk; return the finished JSON object once the array has closed."""
+        for i, ch in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if ch == "]" and self.depth == 1:
+                    # Everything after the array is just the closing brace
+                    return "".join(self.parts) + chunk[:i + 1] + "}"
+        self.parts.append(chunk)
+        return None
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+async def _read_dialog_stream(stream) -> str:
+    """Consume a streamed dialog completion, returning as soon as the dialog array is complete."""
+    scanner = _DialogScanner()
+    refusal = []
     try:
-        response_data = json.loads(response.choices[0].message.content)
-        turns_list = response_data.get("dialog")
-        
-        if not isinstance(turns_list, list):
-            print(f"❌ LLM response did not contain a 'dialog' list. Raw response: {response.choices[0].message.content}")
-            raise ValueError("Invalid JSON structure from LLM")
-        
-        # Ensure speaker names are lowercase to match CHARACTER_ASSETS
-        for turn in turns_list:
-            if 'speaker' in turn:
-                turn['speaker'] = turn['speaker'].lower()
-            
-        return turns_list
-
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"❌ Error processing LLM response: {e}")
-        print(f"Raw LLM response: {response.choices[0].message.content}")
-        raise
-
-
-def make_title(prompt_text: str) -> str:
-    """Generate a catchy YouTube Shorts title from a prompt."""
-    response = client.chat.completions.create(
-        model="gpt-4.1-nano",
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.refusal:
+                refusal.append(delta.refusal)
+            if delta.content:
+                done = scanner.feed(delta.content)
+                if done is not None:
+                    return done
+    finally:
+        # Drop the connection's remaining tail instead of waiting for it
+        await stream.close()
+    # The schema guarantees the shape, so only a refusal or hitting max_tokens lands here
+    if refusal:
+        raise ValueError(f"LLM refused the dialog request: {''.join(refusal)}")
+    raise ValueError(f"Dialog stream ended before the dialog was complete: {scanner.text()}")
+
+
+async def _generate_title(prompt_text: str) -> str:
+    """Ask OpenAI for a single title, stopping at the first line break."""
+    stream = await client.chat.completions.create(
+        model=MODEL,
         messages=[
-            {"role":"system",
-             "content":(
-               "You are a YouTube Shorts title generator. "
-               "Produce a catchy, under-8-word title summarizing the topic."
-             )
-            },
+            TITLE_SYSTEM_MESSAGE,
             {"role":"user", "content":prompt_text}
         ],
-        temperature=0.7,
-        max_tokens=8
+        **TITLE_SAMPLING,
+        max_tokens=8,
+        stream=True
+    )
+    parts = []
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            head, newline, _ = delta.partition("\n")
+            parts.append(head)
+            if newline and "".join(parts).strip():
+                break
+    finally:
+        await stream.close()
+    return "".join(parts).strip()
+
+
+async def _generate_titles(prompts: list[str]) -> list[str]:
+    """Ask OpenAI for one title per prompt in a single request."""
+    if len(prompts) == 1:
+        return [await _generate_title(prompts[0])]
+
+    topics = "\n".join(f"{i}. {p}" for i, p in enumerate(prompts, 1))
+    response = await client.chat.completions.create(
+        model=MODEL,
+        response_format={"type": "json_object"},
+        messages=[
+            TITLE_BATCH_SYSTEM_MESSAGE,
+            {"role": "user", "content": topics}
+        ],
+        **TITLE_SAMPLING,
+        max_tokens=16 * len(prompts)
+    )
+    try:
+        titles = orjson.loads(response.choices[0].message.content).get("titles")
+    except (orjson.JSONDecodeError, AttributeError):
+        titles = None
+    if not isinstance(titles, list) or len(titles) != len(prompts):
+        # Malformed or miscounted batch; fall back to one request per prompt
+        return list(await asyncio.gather(*(_generate_title(p) for p in prompts)))
+    return [str(t).strip() for t in titles]
+
+
+class TitleBatcher:
+    """
+    Coalesces concurrent title requests into one chat completion.
+
+    Requests are buffered until max_batch are waiting or window seconds have
+    passed since the first one, then resolved together. Titles run alongside
+    the much slower dialog call, so the wait is hidden from job latency.
+    """
+
+    def __init__(self, max_batch: int, window: float):
+        self.max_batch = max_batch
+        self.window = window
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer = None
+        self._tasks = set()
+
+    async def title(self, prompt_text: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt_text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: list[tuple[str, asyncio.Future]]):
+        try:
+            titles = await _generate_titles([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), title in zip(batch, titles):
+            if not future.done():
+                future.set_result(title)
+
+
+title_batcher = TitleBatcher(settings.title_batch_size, settings.title_batch_window_ms / 1000)
+
+
+async def make_title(prompt_text: str) -> str:
+    """Generate a catchy YouTube Shorts title from a prompt."""
+    return await _coalesce(("title", _normalize_prompt(prompt_text)), lambda: _make_title(prompt_text))
+
+
+async def _make_title(prompt_text: str) -> str:
+    cache_key = _llm_cache_key("title", TITLE_SYSTEM_PROMPT, prompt_text, TITLE_SAMPLING["temperature"])
+    cached = await _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    if settings.title_batch_size > 1:
+        title = await title_batcher.title(prompt_text)
+    else:
+        title = await _generate_title(prompt_text)
+    await _cache_set(cache_key, title, ttl=settings.llm_title_cache_ttl)
+    return title
+
+# Caps concurrent jobs against OpenAI to respect the account's RPM limit
+openai_slots = asyncio.Semaphore(settings.openai_concurrency)
+
+
+async def generate_dialog_job(job: PromptJobMessage) -> DialogJobMessage:
+    """Generate the dialog and title concurrently and assemble the DialogJob."""
+    async with openai_slots:
+        turns, title = await asyncio.gather(
+            make_dialog(job.prompt, job.character_theme),
+            make_title(job.prompt),
+        )
+    return DialogJobMessage(
+        job_id=job.job_id,
+        title=title,
+        turns=msgspec.convert(turns, list[TurnMessage]),
+        character_theme=job.character_theme
     )
-    return response.choices[0].message.content.strip()
 
-def on_message(ch, method, props, body):
-    job = PromptJob.model_validate_json(body)
+async def on_message(message, exchange):
+    """Handle one prompt; aio-pika runs each delivery in its own task."""
+    try:
+        job = prompt_job_decoder.decode(message.body)
+    except Exception as e:
+        print(f"[✗] Rejected malformed prompt: {e}")
+        await message.reject(requeue=False)
+        return
+
     try:
-        turns  = [Turn(**t) for t in make_dialog(job.prompt, job.character_theme)]
-        title = make_title(job.prompt)
-        out_msg = DialogJob(
-            job_id=job.job_id,
-            title=title,
-            turns=turns,
-            character_theme=job.character_theme
-        ).model_dump_json()
-
-
-        ch.basic_publish(
-            exchange="",
-            routing_key=VIDEO_QUEUE,
-            body=out_msg,
-            properties=pika.BasicProperties(delivery_mode=2)
+        out_msg = json_encoder.encode(await generate_dialog_job(job))
+
+        # Resolves once the broker confirms the persistent write, so the prompt
+        # is only acked after the dialog is safely queued. Concurrent handlers
+        # keep many confirms outstanding, so the broker batches its fsyncs.
+        await exchange.publish(
+            aio_pika.Message(out_msg, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=settings.video_queue,
+            mandatory=True
         )
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        await message.ack()
         print(f"[✓] Generated '{job.character_theme}' script for {job.job_id}")
     except Exception as e:
         print(f"[✗] Failed {job.job_id}: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        await message.nack(requeue=False)
+
+async def consume():
+    # connect_robust transparently reconnects and restores the consumer
+    connection = await aio_pika.connect_robust(settings.rabbit_url, heartbeat=30)
+    async with connection:
+        channel = await connection.channel(publisher_confirms=True)
+        await channel.set_qos(prefetch_count=settings.prefetch_count)
+        queue = await channel.declare_queue(settings.scripts_queue, durable=True)
+        await channel.declare_queue(settings.video_queue, durable=True)
+        await queue.consume(functools.partial(on_message, exchange=channel.default_exchange))
+        print("🚀 Script Generator waiting for prompts…")
+        await asyncio.Future()
 
 def main():
+    if settings.rabbit_url is None:
+        raise ValueError("RABBIT_URL environment variable is not set")
+    # Reuse one loop across reconnects: the pooled OpenAI and Redis connections
+    # belong to the loop that opened them
+    loop = asyncio.new_event_loop()
     while True:
         try:
-            if RABBIT_URL is None:
-                raise ValueError("RABBIT_URL environment variable is not set")
-            connection_params = pika.URLParameters(RABBIT_URL)
-            connection_params.heartbeat = 30
-            connection_params.blocked_connection_timeout = 300
-            connection_params.connection_attempts = 3
-            connection_params.retry_delay = 2
-            
-            conn = pika.BlockingConnection(connection_params)
-            ch = conn.channel()
-            ch.queue_declare(queue=SCRIPTS_QUEUE, durable=True)
-            ch.queue_declare(queue=VIDEO_QUEUE, durable=True)
-            ch.basic_qos(prefetch_count=1)
-            ch.basic_consume(queue=SCRIPTS_QUEUE, on_message_callback=on_message)
-            print("🚀 Script Generator waiting for prompts…")
-            ch.start_consuming()
+            loop.run_until_complete(consume())
         except KeyboardInterrupt:
             print("🛑 Script Generator shutting down...")
-            if 'ch' in locals():
-                ch.stop_consuming()
-            if 'conn' in locals():
-                conn.close()
             break
         except Exception as e:
             print(f"⚠️ Connection error: {e}. Reconnecting in 5 seconds...")
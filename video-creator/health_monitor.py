@@ -8,15 +8,28 @@ for video creator workers in the auto-scaling system.
 
 import os
 import json
+import collections
 import time
 import signal
+import socketserver
 import threading
 import redis
 from datetime import datetime
 from typing import Optional, Dict, Any
-from flask import Flask, jsonify
 import logging
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,41 +37,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Each worker is a native Redis hash, listed in an index set for readers
+WORKER_KEY_PREFIX = 'scaling_worker:'
+WORKER_INDEX_KEY = 'scaling_workers_index'
+
+# Upper bound on tracked job start times, so jobs that never report
+# completion can't grow the table for the life of the worker
+MAX_TRACKED_JOBS = 256
+
+_NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+_BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+def _json_response(body: bytes) -> bytes:
+    """Build a complete HTTP response carrying a JSON body"""
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: %d\r\n"
+        b"Connection: close\r\n\r\n" % len(body)
+    ) + body
+
+
+class _HealthRequestHandler(socketserver.BaseRequestHandler):
+    """Answers a probe with the pre-built response for its path"""
+    
+    def handle(self):
+        self.request.settimeout(5)
+        data = b''
+        try:
+            while b'\r\n\r\n' not in data and len(data) < 8192:
+                chunk = self.request.recv(1024)
+                if not chunk:
+                    return
+                data += chunk
+        except OSError:
+            return  # Client timed out or went away
+        
+        # Request line: METHOD SP PATH SP VERSION
+        parts = data.split(b' ', 2)
+        if len(parts) < 3:
+            self.request.sendall(_BAD_REQUEST)
+            return
+        path = parts[1].split(b'?', 1)[0]
+        self.request.sendall(self.server.responses.get(path, _NOT_FOUND))
+
+
+class _HealthServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    responses: Dict[bytes, bytes] = {}
+
 class WorkerHealthMonitor:
     """Health monitoring system for video creator workers"""
     
     def __init__(self, redis_url: str, worker_id: Optional[str] = None):
         self.redis_url = redis_url
         self.worker_id = worker_id or self._generate_worker_id()
+        self._redis_pool = None
         self.redis_client = None
+        self.worker_key = f"{WORKER_KEY_PREFIX}{self.worker_id}"
         self.is_healthy = True
         self.last_heartbeat = datetime.now()
         self.current_job = None
-        self.started_at = datetime.now()
+        self.started_at = datetime.now().isoformat()  # Wall-clock start, for display only
+        self._started_mono = time.monotonic()  # Uptime is measured on the monotonic clock
         self.jobs_processed = 0
         self.jobs_failed = 0
         self.is_shutting_down = False
         
         # Capacity tracking
-        self.job_start_times = {}  # Track job start times for duration calculation
+        self.job_start_times = collections.OrderedDict()  # Monotonic job start times, oldest first
+        self._jobs_lock = threading.Lock()  # Jobs start and finish on different threads
         self.capacity_tracker = None
         
+        # Resource samples are reused briefly so bursts of completions don't
+        # each pay for the syscalls; disk usage barely moves, so it lives longer
+        self._resource_sample_ttl = 2.0
+        self._disk_sample_ttl = 10.0
+        self._last_resource_sample = None  # (cpu, memory, monotonic ts)
+        self._last_disk_sample = None      # (disk, monotonic ts)
+        if psutil:
+            # Prime the CPU counters so later non-blocking reads have a baseline
+            psutil.cpu_percent(interval=None)
+        
         # Health check server
-        self.health_app = Flask(__name__)
         self.health_server = None
         self.health_port = int(os.getenv("HEALTH_CHECK_PORT", "8000"))
         
+        # Complete HTTP responses per path, rebuilt on every heartbeat
+        self._status_cache: Dict[bytes, bytes] = {}
+        self._status_lock = threading.Lock()
+        
         # Configuration
         self.heartbeat_interval = int(os.getenv("HEARTBEAT_INTERVAL", "10"))
         self.graceful_shutdown_timeout = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "300"))
+        self.heartbeat_debounce = float(os.getenv("HEARTBEAT_DEBOUNCE", "0.25"))
         
         # Threading
         self.heartbeat_thread = None
         self.shutdown_event = threading.Event()
+        self._heartbeat_wakeup = threading.Event()
+        self._last_heartbeat_mono = 0.0
+        self._heartbeat_dirty = False
+        self._teardown_lock = threading.Lock()
+        self._teardown_done = False
         
         # Setup
-        self._setup_health_endpoints()
         self._setup_signal_handlers()
+        self._refresh_status_cache()
         
         logger.info(f"Worker health monitor initialized: {self.worker_id}")
     
@@ -69,28 +156,27 @@ class WorkerHealthMonitor:
         timestamp = int(time.time())
         return f"worker-{hostname}-{pid}-{timestamp}"
     
-    def _setup_health_endpoints(self):
-        """Setup Flask health check endpoints"""
-        @self.health_app.route('/health')
-        def health_check():
-            """Health check endpoint"""
-            return jsonify(self.get_health_status())
-        
-        @self.health_app.route('/metrics')
-        def metrics():
-            """Metrics endpoint"""
-            return jsonify(self.get_worker_metrics())
-        
-        @self.health_app.route('/status')
-        def status():
-            """Detailed status endpoint"""
-            return jsonify(self.get_detailed_status())
+    def _refresh_status_cache(self):
+        """Rebuild the cached endpoint bodies so requests only return bytes"""
+        health = self.get_health_status()
+        metrics = self.get_worker_metrics()
+        snapshot = {
+            b'/health': _json_response(_dumps(health)),
+            b'/metrics': _json_response(_dumps(metrics)),
+            b'/status': _json_response(_dumps(self.get_detailed_status(health, metrics)))
+        }
+        with self._status_lock:
+            self._status_cache = snapshot
+            if self.health_server:
+                self.health_server.responses = snapshot
     
     def _setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown"""
         def signal_handler(signum, frame):
-            logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-            self.initiate_graceful_shutdown()
+            # Only flip flags here: Redis calls or logging from signal context can
+            # deadlock on locks the interrupted code holds. The heartbeat thread
+            # does the actual teardown.
+            self._request_shutdown()
         
         signal.signal(signal.SIGTERM, signal_handler)
         signal.signal(signal.SIGINT, signal_handler)
@@ -98,7 +184,9 @@ class WorkerHealthMonitor:
     def connect_redis(self) -> bool:
         """Connect to Redis"""
         try:
-            self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+            # One small pool shared with the capacity tracker
+            self._redis_pool = redis.ConnectionPool.from_url(self.redis_url, decode_responses=True, max_connections=8)
+            self.redis_client = redis.Redis(connection_pool=self._redis_pool)
             self.redis_client.ping()
             logger.info("Connected to Redis for health monitoring")
             return True
@@ -116,16 +204,19 @@ class WorkerHealthMonitor:
                 'id': self.worker_id,
                 'status': 'active',
                 'health_status': 'healthy' if self.is_healthy else 'unhealthy',
-                'started_at': self.started_at.isoformat(),
+                'started_at': self.started_at,
                 'last_seen': datetime.now().isoformat(),
-                'current_job': self.current_job,
+                'current_job': self.current_job or '',
                 'jobs_processed': self.jobs_processed,
                 'jobs_failed': self.jobs_failed,
-                'is_shutting_down': self.is_shutting_down,
+                'is_shutting_down': int(self.is_shutting_down),
                 'health_check_port': self.health_port
             }
             
-            self.redis_client.hset('scaling_workers', self.worker_id, json.dumps(worker_data))
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(self.worker_key, mapping=worker_data)
+            pipe.sadd(WORKER_INDEX_KEY, self.worker_id)
+            pipe.execute()
             logger.info(f"Worker registered: {self.worker_id}")
             return True
             
@@ -133,45 +224,62 @@ class WorkerHealthMonitor:
             logger.error(f"Failed to register worker: {e}")
             return False
     
-    def update_heartbeat(self):
-        """Update worker heartbeat in Redis"""
+    def update_heartbeat(self, force: bool = False):
+        """
+        Update worker heartbeat in Redis
+        
+        On-demand updates (force=False) arriving within the debounce window of
+        the previous write are coalesced: the heartbeat thread sends one
+        write for all of them once the window has passed.
+        """
         try:
             if not self.redis_client:
                 return False
             
-            self.last_heartbeat = datetime.now()
+            if not force and time.monotonic() - self._last_heartbeat_mono < self.heartbeat_debounce:
+                self._heartbeat_dirty = True
+                self._heartbeat_wakeup.set()
+                self._refresh_status_cache()
+                return True
             
-            # Get current worker data
-            worker_data_str = self.redis_client.hget('scaling_workers', self.worker_id)
-            if worker_data_str:
-                worker_data = json.loads(worker_data_str)
-            else:
-                worker_data = {}
-            
-            # Update with current status
-            worker_data.update({
-                'health_status': 'healthy' if self.is_healthy else 'unhealthy',
-                'last_seen': self.last_heartbeat.isoformat(),
-                'current_job': self.current_job,
-                'jobs_processed': self.jobs_processed,
-                'jobs_failed': self.jobs_failed,
-                'is_shutting_down': self.is_shutting_down
-            })
-            
-            self.redis_client.hset('scaling_workers', self.worker_id, json.dumps(worker_data))
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_heartbeat(pipe)
+            pipe.execute()
             return True
             
         except Exception as e:
             logger.error(f"Failed to update heartbeat: {e}")
             return False
     
+    def _queue_heartbeat(self, pipe):
+        """Queue the heartbeat write on pipe"""
+        self.last_heartbeat = datetime.now()
+        self._last_heartbeat_mono = time.monotonic()
+        self._heartbeat_dirty = False
+        # Only the fields that change are written; no read and no re-encoding.
+        # Re-adding to the index keeps a worker visible if a reader pruned it.
+        pipe.hset(self.worker_key, mapping={
+            'health_status': 'healthy' if self.is_healthy else 'unhealthy',
+            'last_seen': self.last_heartbeat.isoformat(),
+            'current_job': self.current_job or '',
+            'jobs_processed': self.jobs_processed,
+            'jobs_failed': self.jobs_failed,
+            'is_shutting_down': int(self.is_shutting_down)
+        })
+        pipe.sadd(WORKER_INDEX_KEY, self.worker_id)
+        # Endpoints serve the same state the heartbeat reports
+        self._refresh_status_cache()
+    
     def unregister_worker(self):
         """Unregister worker from Redis"""
         try:
             if not self.redis_client:
                 return False
             
-            self.redis_client.hdel('scaling_workers', self.worker_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(self.worker_key)
+            pipe.srem(WORKER_INDEX_KEY, self.worker_id)
+            pipe.execute()
             logger.info(f"Worker unregistered: {self.worker_id}")
             return True
             
@@ -187,28 +295,29 @@ class WorkerHealthMonitor:
             'last_heartbeat': self.last_heartbeat.isoformat(),
             'current_job': self.current_job,
             'is_shutting_down': self.is_shutting_down,
-            'uptime_seconds': (datetime.now() - self.started_at).total_seconds()
+            'uptime_seconds': time.monotonic() - self._started_mono
         }
     
     def get_worker_metrics(self) -> Dict[str, Any]:
         """Get worker performance metrics"""
-        uptime = datetime.now() - self.started_at
+        uptime = time.monotonic() - self._started_mono
         
         return {
             'worker_id': self.worker_id,
             'jobs_processed': self.jobs_processed,
             'jobs_failed': self.jobs_failed,
             'success_rate': self.jobs_processed / (self.jobs_processed + self.jobs_failed) if (self.jobs_processed + self.jobs_failed) > 0 else 0,
-            'uptime_seconds': uptime.total_seconds(),
-            'jobs_per_hour': (self.jobs_processed / uptime.total_seconds()) * 3600 if uptime.total_seconds() > 0 else 0
+            'uptime_seconds': uptime,
+            'jobs_per_hour': (self.jobs_processed / uptime) * 3600 if uptime > 0 else 0
         }
     
-    def get_detailed_status(self) -> Dict[str, Any]:
+    def get_detailed_status(self, health: Optional[Dict[str, Any]] = None,
+                            metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get detailed worker status"""
         return {
             'worker_id': self.worker_id,
-            'health': self.get_health_status(),
-            'metrics': self.get_worker_metrics(),
+            'health': health or self.get_health_status(),
+            'metrics': metrics or self.get_worker_metrics(),
             'config': {
                 'heartbeat_interval': self.heartbeat_interval,
                 'graceful_shutdown_timeout': self.graceful_shutdown_timeout,
@@ -218,16 +327,24 @@ class WorkerHealthMonitor:
     
     def set_current_job(self, job_id: str):
         """Set the current job being processed"""
-        self.current_job = job_id
-        self.job_start_times[job_id] = datetime.now()
+        with self._jobs_lock:
+            self.current_job = job_id
+            self.job_start_times[job_id] = time.monotonic()
+            self.job_start_times.move_to_end(job_id)
+            evicted = None
+            if len(self.job_start_times) > MAX_TRACKED_JOBS:
+                evicted, _ = self.job_start_times.popitem(last=False)
+        if evicted is not None:
+            logger.warning(f"Job start times over {MAX_TRACKED_JOBS} entries; evicted {evicted}, which never reported completion")
         logger.info(f"Worker {self.worker_id} started processing job: {job_id}")
     
     def job_completed(self, job_id: str, success: bool = True):
         """Mark current job as completed"""
-        job_duration = 0
-        if job_id in self.job_start_times:
-            job_duration = (datetime.now() - self.job_start_times[job_id]).total_seconds()
-            del self.job_start_times[job_id]
+        with self._jobs_lock:
+            start = self.job_start_times.pop(job_id, None)
+            # Report the most recently started job still running, if any
+            self.current_job = next(reversed(self.job_start_times), None)
+        job_duration = time.monotonic() - start if start is not None else 0
         
         if success:
             self.jobs_processed += 1
@@ -236,11 +353,20 @@ class WorkerHealthMonitor:
             self.jobs_failed += 1
             logger.error(f"Worker {self.worker_id} failed job: {job_id} after {job_duration:.1f}s")
         
-        # Update capacity tracker
-        self._update_capacity_metrics(job_duration, success)
-        
-        self.current_job = None
-        self.update_heartbeat()
+        self._flush_job_state(job_duration, success)
+    
+    def _flush_job_state(self, job_duration: float, job_success: bool):
+        """Send the capacity update and heartbeat for a finished job in one round trip"""
+        try:
+            if not self.redis_client:
+                return
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._update_capacity_metrics(job_duration, job_success, pipe)
+            self._queue_heartbeat(pipe)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to flush job state: {e}")
     
     def set_health_status(self, healthy: bool, reason: str = ""):
         """Set worker health status"""
@@ -249,31 +375,41 @@ class WorkerHealthMonitor:
         logger.info(f"Worker {self.worker_id} health status: {status} - {reason}")
         self.update_heartbeat()
     
-    def initiate_graceful_shutdown(self):
-        """Initiate graceful shutdown process"""
+    def _request_shutdown(self):
+        """Mark the worker as shutting down and wake the heartbeat thread"""
         self.is_shutting_down = True
         self.is_healthy = False
+        self.shutdown_event.set()
+        self._heartbeat_wakeup.set()
+    
+    def initiate_graceful_shutdown(self):
+        """Initiate graceful shutdown process"""
+        self._request_shutdown()
         
         logger.info(f"Worker {self.worker_id} initiating graceful shutdown...")
         
-        # Update Redis to indicate shutdown
-        self.update_heartbeat()
-        
-        # Set shutdown event
-        self.shutdown_event.set()
-        
         # If there's a current job, wait for it to complete
         if self.current_job:
             logger.info(f"Waiting for current job {self.current_job} to complete...")
             # This will be handled by the main video creator loop
         
-        # Stop heartbeat thread
+        # The heartbeat thread reports the shutdown and unregisters on its way out
         if self.heartbeat_thread and self.heartbeat_thread.is_alive():
             self.heartbeat_thread.join(timeout=5)
-        
-        # Unregister worker
+        else:
+            self._finish_shutdown()
+    
+    def _finish_shutdown(self):
+        """Unregister from Redis, once"""
+        with self._teardown_lock:
+            if self._teardown_done:
+                return
+            self._teardown_done = True
+        
+        # A final heartbeat would be deleted by the unregister right after it;
+        # only the local endpoints still need to show the shutdown
+        self._refresh_status_cache()
         self.unregister_worker()
-        
         logger.info(f"Worker {self.worker_id} graceful shutdown completed")
     
     def start_heartbeat_thread(self):
@@ -281,11 +417,26 @@ class WorkerHealthMonitor:
         def heartbeat_loop():
             while not self.shutdown_event.is_set():
                 try:
-                    self.update_heartbeat()
-                    time.sleep(self.heartbeat_interval)
+                    self.update_heartbeat(force=True)
                 except Exception as e:
                     logger.error(f"Error in heartbeat loop: {e}")
-                    time.sleep(5)
+                # Sleep until the next tick, waking early for shutdown or for a
+                # coalesced on-demand update
+                deadline = time.monotonic() + self.heartbeat_interval
+                while not self._heartbeat_dirty and not self.shutdown_event.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._heartbeat_wakeup.wait(remaining)
+                    self._heartbeat_wakeup.clear()
+                if self._heartbeat_dirty:
+                    # Let the debounce window close so a burst becomes one write
+                    remaining = self.heartbeat_debounce - (time.monotonic() - self._last_heartbeat_mono)
+                    if remaining > 0:
+                        self.shutdown_event.wait(remaining)
+            
+            logger.info(f"Worker {self.worker_id} shutdown requested, deregistering...")
+            self._finish_shutdown()
         
         self.heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
         self.heartbeat_thread.start()
@@ -293,20 +444,16 @@ class WorkerHealthMonitor:
     
     def start_health_server(self):
         """Start the health check server"""
-        def run_server():
-            try:
-                self.health_app.run(
-                    host='0.0.0.0',
-                    port=self.health_port,
-                    debug=False,
-                    use_reloader=False,
-                    threaded=True
-                )
-            except Exception as e:
-                logger.error(f"Health server error: {e}")
+        # Probes only ever read the cached snapshot, so a bare socket server
+        # answering with pre-built bytes is all that is needed
+        try:
+            self.health_server = _HealthServer(('0.0.0.0', self.health_port), _HealthRequestHandler)
+        except OSError as e:
+            logger.error(f"Health server error: {e}")
+            return
+        self.health_server.responses = self._status_cache
         
-        self.health_server = threading.Thread(target=run_server, daemon=True)
-        self.health_server.start()
+        threading.Thread(target=self.health_server.serve_forever, daemon=True).start()
         logger.info(f"Health server started on port {self.health_port}")
     
     def start(self):
@@ -325,7 +472,7 @@ class WorkerHealthMonitor:
             sys.path.append('/app/scaling-controller')
             from capacity_tracker import CapacityTracker
             
-            self.capacity_tracker = CapacityTracker(self.redis_url)
+            self.capacity_tracker = CapacityTracker(self.redis_url, redis_client=self.redis_client)
             if self.capacity_tracker.connect_redis():
                 logger.info("Capacity tracker initialized")
             else:
@@ -360,15 +507,19 @@ class WorkerHealthMonitor:
     
     def should_accept_new_jobs(self) -> bool:
         """Check if worker should accept new jobs based on health and capacity"""
-        if not self.is_healthy or self.is_shutting_down:
-            return False
-        
-        # Check capacity limits
+        return self.is_accepting_jobs() and self.has_free_capacity()
+    
+    def is_accepting_jobs(self) -> bool:
+        """Check if worker is healthy and not shutting down"""
+        return self.is_healthy and not self.is_shutting_down
+    
+    def has_free_capacity(self) -> bool:
+        """Check if another job fits under this worker's concurrent job limit"""
         if self.capacity_tracker:
             try:
                 capacity = self.capacity_tracker.get_worker_capacity(self.worker_id)
                 if capacity:
-                    current_jobs = len([job for job in self.job_start_times.keys()])
+                    current_jobs = len(self.job_start_times)
                     if current_jobs >= capacity.concurrent_job_limit:
                         logger.debug(f"Worker {self.worker_id} at capacity limit: {current_jobs}/{capacity.concurrent_job_limit}")
                         return False
@@ -377,28 +528,14 @@ class WorkerHealthMonitor:
         
         return True
     
-    def _update_capacity_metrics(self, job_duration: float, job_success: bool):
-        """Update capacity metrics for this worker"""
+    def _update_capacity_metrics(self, job_duration: float, job_success: bool, pipe=None):
+        """Update capacity metrics for this worker, queuing the writes on pipe if given"""
         if not self.capacity_tracker:
             return
         
-        try:
-            # Get basic resource usage (simplified - in production, use psutil)
-            import psutil
-            cpu_usage = psutil.cpu_percent(interval=0.1)
-            memory_usage = psutil.virtual_memory().percent
-            disk_usage = psutil.disk_usage('/').percent
-        except ImportError:
-            # Fallback if psutil not available
-            cpu_usage = 50.0  # Default values
-            memory_usage = 60.0
-            disk_usage = 30.0
-        except Exception:
-            cpu_usage = 50.0
-            memory_usage = 60.0
-            disk_usage = 30.0
+        cpu_usage, memory_usage, disk_usage = self._sample_resources()
         
-        current_jobs = len([job for job in self.job_start_times.keys()])
+        current_jobs = len(self.job_start_times)
         
         try:
             self.capacity_tracker.update_worker_capacity(
@@ -409,11 +546,34 @@ class WorkerHealthMonitor:
                 cpu_usage=cpu_usage,
                 memory_usage=memory_usage,
                 disk_usage=disk_usage,
-                current_jobs=current_jobs
+                current_jobs=current_jobs,
+                pipe=pipe
             )
         except Exception as e:
             logger.warning(f"Failed to update capacity metrics: {e}")
 
+    def _sample_resources(self):
+        """Return (cpu, memory, disk) usage percentages, reusing recent samples"""
+        if not psutil:
+            return 50.0, 60.0, 30.0  # Default values when psutil is unavailable
+        
+        now = time.monotonic()
+        try:
+            if self._last_resource_sample is None or now - self._last_resource_sample[2] >= self._resource_sample_ttl:
+                # interval=None returns immediately with usage since the previous call
+                self._last_resource_sample = (
+                    psutil.cpu_percent(interval=None),
+                    psutil.virtual_memory().percent,
+                    now
+                )
+            if self._last_disk_sample is None or now - self._last_disk_sample[1] >= self._disk_sample_ttl:
+                self._last_disk_sample = (psutil.disk_usage('/').percent, now)
+        except Exception:
+            return 50.0, 60.0, 30.0
+        
+        cpu_usage, memory_usage, _ = self._last_resource_sample
+        return cpu_usage, memory_usage, self._last_disk_sample[0]
+
 # Global health monitor instance
 health_monitor = None
 
@@ -1,21 +1,28 @@
 # 3rd-party
-import os, glob, json, tempfile, base64, re, random, time, traceback
+import os, glob, json, tempfile, base64, re, random, time, traceback, functools, hashlib
+import shutil, subprocess, threading
 import requests, numpy as np            # type: ignore
+import orjson                           # type: ignore
+from PIL import Image, ImageColor, ImageDraw, ImageFont  # type: ignore
 import pika                             # type: ignore
 import redis                            # type: ignore
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from requests.adapters import HTTPAdapter  # type: ignore
 from requests.exceptions import ConnectionError, Timeout, HTTPError
 import socket
 from moviepy.editor import (            # type: ignore
     VideoFileClip,
     AudioFileClip,
     CompositeAudioClip,
-    TextClip,          # NEW – captions
-    ImageClip,
-    CompositeVideoClip,
+    VideoClip,
 )
 from moviepy.audio.fx.all import audio_loop   # type: ignore
-from common.schemas import DialogJob, RenderJob
+from moviepy.video.fx.all import loop as video_loop  # type: ignore
+from moviepy.config import get_setting         # type: ignore
+from common.schemas import RenderJob
+from common.messages import DialogJobMessage, dialog_job_decoder
 from config import (
     RABBIT_URL,
     VIDEO_QUEUE,
@@ -27,12 +34,24 @@ from config import (
     RICK_VOICE_ID,
     MORTY_VOICE_ID,
     LONG_BG_VIDEO,
+    BG_SEGMENT_DIR,
+    BG_SEGMENTS,
+    BG_SEGMENT_SECONDS,
     AUDIO_ASSETS_DIR,
     REDIS_URL,
     ENABLE_PUBLISHER,
     TTS_MAX_RETRIES,
     TTS_RETRY_DELAY,
     TTS_BACKOFF_MULTIPLIER,
+    TTS_CONCURRENCY,
+    RENDER_WORKERS,
+    VIDEO_PRESET,
+    VIDEO_ENCODER,
+    PROGRESS_INTERVAL,
+    PREFETCH_COUNT,
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_AGE_DAYS,
+    TTS_REDIS_CACHE_TTL,
     DATABASE_URL,
 )
 
@@ -67,6 +86,7 @@ def update_user_video_status(job_id: str, status: str, file_path: Optional[str]
 HEADERS = {"xi-api-key": ELEVEN_API_KEY}
 
 # --- NEW: Generalized Character Asset Configuration ---
+CHARACTER_ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 CHARACTER_ASSETS = {
     "family_guy": {
         "peter": {"voice_id": PETER_VOICE_ID, "image": "peter_griffin.png"},
@@ -76,26 +96,34 @@ CHARACTER_ASSETS = {
         "morty": {"voice_id": MORTY_VOICE_ID, "image": "morty.png"}
     }
 }
+# Every render is a vertical short on a fixed canvas
+CANVAS_W, CANVAS_H = 1080, 1920
 CHAR_HEIGHT = 650
+SPRITE_X, SPRITE_Y = 30, CANVAS_H - CHAR_HEIGHT - 150
 
 # ── TTS API Retry Configuration ────────────────────────────────────────────────
 # Use imported config values
 
+# Keep-alive pool for api.elevenlabs.io so turns (and concurrent TTS workers)
+# reuse TLS connections. Retries stay in tts_api_call_with_retry below.
+TTS_SESSION = requests.Session()
+TTS_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+
 def tts_api_call_with_retry(url: str, payload: dict, headers: dict, max_retries: int = TTS_MAX_RETRIES) -> requests.Response:
     """
     Make a TTS API call with retry logic for handling transient network errors.
-    Retries on connection errors, timeouts, socket errors (including ConnectionResetError), and 5xx server errors.
+    Retries on connection errors, timeouts, socket errors (including ConnectionResetError), 429 rate limits and 5xx server errors.
     """
     last_exception = None
     
     for attempt in range(max_retries + 1):
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = TTS_SESSION.post(url, json=payload, headers=headers, timeout=30)
             response.raise_for_status()
             return response
         except HTTPError as e:
-            # HTTP errors - only retry on 5xx server errors
-            if e.response.status_code >= 500:
+            # HTTP errors - only retry on rate limiting and 5xx server errors
+            if e.response.status_code == 429 or e.response.status_code >= 500:
                 last_exception = e
                 if attempt < max_retries:
                     delay = TTS_RETRY_DELAY * (TTS_BACKOFF_MULTIPLIER ** attempt)
@@ -130,55 +158,332 @@ def tts_api_call_with_retry(url: str, payload: dict, headers: dict, max_retries:
         raise Exception("TTS API call failed after all retries")
 
 # ── caption style ────────────────────────────────────────────────────────────
-# Thick, punchy subtitles for Shorts
-FONT        = "DejaVu-Sans-Bold"   
+# Thick, punchy subtitles for Shorts. Captions are rasterised in-process with
+# Pillow, so FONT is a TrueType file (resolved against the system font dirs).
+FONT        = "DejaVuSans-Bold.ttf"
+FONT_FALLBACK = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
 FONTSIZE    = 75                    # Reduced from 100 for smaller size
 STROKE      = 3                     # Increased stroke for more boldness
 # caption block is centred horizontally and sits CAP_Y_BASE px above bottom
 CAP_Y_BASE  = 1300                 # Changed from 1120 to 1300 (moves text higher up)
+CAPTION_Y   = CANVAS_H - CAP_Y_BASE
 # layout limits
 MAX_LINE_W   = 920                
+CAP_X_MIN, CAP_X_MAX = 40, CANVAS_W - 40
 LINE_SPACING = 20                 
 
-def tts_to_file(text: str, voice_id: str, dst: str) -> None:
+@functools.lru_cache(maxsize=8)
+def _caption_font(font: str, fontsize: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font, fontsize)
+
+def probe_caption_font() -> None:
+    """
+    Check once at startup that FONT loads, falling back to the DejaVu file
+    installed in the image otherwise.
+    """
+    global FONT
+    try:
+        _caption_font(FONT, FONTSIZE)
+    except OSError as e:
+        print(f"⚠️ Caption font {FONT} unavailable, using {FONT_FALLBACK}: {e}")
+        FONT = FONT_FALLBACK
+    _space_width()
+
+@functools.lru_cache(maxsize=4096)
+def _measure_word(text: str, font: str, fontsize: int) -> int:
+    """
+    Advance width in px of `text` without stroke. Memoized so repeated words
+    across lines and turns are only measured once.
+    """
+    return int(round(_caption_font(font, fontsize).getlength(text)))
+
+_SPACE_WIDTH: Optional[int] = None
+
+def _space_width() -> int:
+    """
+    Width of the inter-word space for the caption font, measured once.
+    """
+    global _SPACE_WIDTH
+    if _SPACE_WIDTH is None:
+        _SPACE_WIDTH = _measure_word(" ", FONT, FONTSIZE)
+    return _SPACE_WIDTH
+
+class Overlay(NamedTuple):
+    """
+    A pre-rasterised bitmap placed at (x, y) for start <= t < end. Channels
+    are stored as uint16 so blending needs no per-frame upcast of the source.
+    """
+    rgb: np.ndarray    # (h, w, 3) uint16
+    alpha: np.ndarray  # (h, w, 1) uint16, 0..255
+    x: int
+    y: int
+    start: float
+    end: float
+
+@functools.lru_cache(maxsize=2048)
+def _word_coverage(text: str, font: str, fontsize: int, stroke: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rasterise a black-stroked word once into (fill, alpha) coverage planes:
+    alpha covers glyph and stroke, fill is how much of the fill colour shows.
+    Every caption colour is derived from the same planes.
+    """
+    f = _caption_font(font, fontsize)
+    left, top, right, bottom = f.getbbox(text, stroke_width=stroke)
+    size = (max(1, right - left), max(1, bottom - top))
+    alpha_im = Image.new("L", size, 0)
+    ImageDraw.Draw(alpha_im).text((-left, -top), text, font=f, fill=255,
+                                  stroke_width=stroke, stroke_fill=255)
+    alpha = np.asarray(alpha_im, dtype=np.uint16)[:, :, None]
+    if stroke:
+        fill_im = Image.new("L", size, 0)
+        ImageDraw.Draw(fill_im).text((-left, -top), text, font=f, fill=255,
+                                     stroke_width=stroke, stroke_fill=0)
+        fill = np.asarray(fill_im, dtype=np.uint16)[:, :, None]
+    else:
+        # Without a stroke every covered pixel is pure fill colour
+        fill = np.full_like(alpha, 255)
+    fill.setflags(write=False)
+    alpha.setflags(write=False)
+    return fill, alpha
+
+@functools.lru_cache(maxsize=2048)
+def _render_word(text: str, color: str, font: str, fontsize: int, stroke: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (rgb, alpha) bitmap of a caption word in `color`; placements share it.
+    """
+    fill, alpha = _word_coverage(text, font, fontsize, stroke)
+    ink = np.array(ImageColor.getrgb(color)[:3], dtype=np.uint16)
+    rgb = (fill * ink + 127) // 255
+    rgb.setflags(write=False)
+    return rgb, alpha
+
+@functools.lru_cache(maxsize=32)
+def _sprite_bitmap(img_path: str, height: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decode and resize a character sprite once per (image, height); turns by
+    the same speaker reuse the arrays.
+    """
+    with Image.open(img_path) as im:
+        width = int(im.width * height / im.height)
+        rgba = np.asarray(im.convert("RGBA").resize((width, height), Image.LANCZOS))
+    rgb = rgba[:, :, :3].astype(np.uint16)
+    alpha = rgba[:, :, 3:].astype(np.uint16)
+    rgb.setflags(write=False)
+    alpha.setflags(write=False)
+    return rgb, alpha
+
+def _blit(frame: np.ndarray, layer: Overlay) -> None:
+    """
+    Alpha-blend `layer` into `frame` in place with integer math, cropping it
+    to the frame bounds. (v + 128 + ((v + 128) >> 8)) >> 8 is v / 255 rounded.
+    """
+    h, w = layer.alpha.shape[:2]
+    fh, fw = frame.shape[:2]
+    x0, y0 = max(layer.x, 0), max(layer.y, 0)
+    x1, y1 = min(layer.x + w, fw), min(layer.y + h, fh)
+    if x0 >= x1 or y0 >= y1:
+        return
+    src_rows = slice(y0 - layer.y, y1 - layer.y)
+    src_cols = slice(x0 - layer.x, x1 - layer.x)
+    alpha = layer.alpha[src_rows, src_cols]
+    dst = frame[y0:y1, x0:x1]
+    v = layer.rgb[src_rows, src_cols] * alpha + dst * (255 - alpha) + 128
+    dst[...] = (v + (v >> 8)) >> 8
+
+
+_WORD_SPAN = re.compile(r"\S+")
+_WORD_CLEAN = re.compile(r"[^\w']")
+
+TTS_MODEL_BASIC      = "eleven_monolingual_v1"
+TTS_MODEL_TIMESTAMPS = "eleven_multilingual_v2"
+# Ask for MP3 explicitly rather than relying on the endpoint default; files are
+# named .mp3 so ffmpeg probes them as what they are
+TTS_OUTPUT_FORMAT    = "mp3_44100_128"
+TTS_SETTINGS_BASIC      = {"stability": 0.5, "similarity_boost": 0.8}
+TTS_SETTINGS_TIMESTAMPS = {
+    "stability": 0.5,
+    "similarity_boost": 0.8,
+    "style": 0.0,
+    "use_speaker_boost": True
+}
+
+def _tts_cache_path(voice_id: str, model_id: str, voice_settings: dict, text: str) -> str:
+    """
+    Stable on-disk location for a synthesized line. Unlike hash(), blake2b is
+    identical across processes, so re-renders reuse audio already paid for.
+    """
+    settings = json.dumps(voice_settings, sort_keys=True)
+    key = hashlib.blake2b(f"{voice_id}|{model_id}|{settings}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+
+# Second cache tier shared by every worker, so a line synthesized on one
+# container is not paid for again on another. Best effort: errors are misses.
+_tts_redis = None
+
+def _shared_tts_cache():
+    global _tts_redis
+    if _tts_redis is None and REDIS_URL and TTS_REDIS_CACHE_TTL > 0:
+        _tts_redis = redis.Redis.from_url(REDIS_URL, socket_timeout=2)
+    return _tts_redis
+
+# Job status writes share one pool for the life of the consumer rather than
+# building a fresh client on every progress tick and status transition.
+_redis_pool = None
+
+def _redis():
+    global _redis_pool
+    if _redis_pool is None:
+        _redis_pool = redis.ConnectionPool.from_url(REDIS_URL, decode_responses=True, max_connections=8)
+    return redis.Redis(connection_pool=_redis_pool)
+
+def _replace_job_status(r, job_id: str, status: dict) -> None:
+    """
+    Replace a job's status hash in one transaction, so fields from an earlier
+    stage (progress, stage) do not linger on a finished job.
+    """
+    pipe = r.pipeline()
+    pipe.delete(job_id)
+    pipe.hset(job_id, mapping=status)
+    pipe.execute()
+
+def _shared_tts_key(audio_file: str) -> str:
+    return "tts:" + os.path.splitext(os.path.basename(audio_file))[0]
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """
+    Write via a sibling temp file so concurrent workers never read a partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _load_cached_tts(audio_file: str) -> Optional[list[dict]]:
+    """
+    Return cached word timings for `audio_file`, or None on a miss. The timings
+    file is written last, so its presence means the audio is complete. On a
+    local miss the shared Redis tier is consulted and copied to disk.
+    """
+    timings_file = audio_file + ".json"
+    try:
+        with open(timings_file, "r") as f:
+            word_timings = json.load(f)
+        now = time.time()
+        os.utime(audio_file, (now, now))
+        os.utime(timings_file, (now, now))
+        return word_timings
+    except (OSError, ValueError):
+        pass
+
+    shared = _shared_tts_cache()
+    if shared is None:
+        return None
+    try:
+        audio_data, timings = shared.hmget(_shared_tts_key(audio_file), "audio", "timings")
+    except redis.RedisError as e:
+        print(f"Warning: shared TTS cache read failed: {e}")
+        return None
+    if audio_data is None or timings is None:
+        return None
+    _atomic_write(audio_file, audio_data)
+    _atomic_write(timings_file, timings)
+    return orjson.loads(timings)
+
+def _store_cached_tts(audio_file: str, audio_data: Optional[bytes], word_timings: list[dict]) -> None:
+    """
+    Cache a synthesized line on disk and in the shared tier. Pass audio_data
+    as None when the audio has already been written to `audio_file`.
+    """
+    timings = json.dumps(word_timings).encode("utf-8")
+    if audio_data is None:
+        with open(audio_file, "rb") as f:
+            audio_data = f.read()
+    else:
+        _atomic_write(audio_file, audio_data)
+    _atomic_write(audio_file + ".json", timings)
+
+    shared = _shared_tts_cache()
+    if shared is None:
+        return
+    try:
+        key = _shared_tts_key(audio_file)
+        pipe = shared.pipeline(transaction=False)
+        pipe.hset(key, mapping={"audio": audio_data, "timings": timings})
+        pipe.expire(key, TTS_REDIS_CACHE_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Warning: shared TTS cache write failed: {e}")
+
+def prune_tts_cache(max_age_days: int = TTS_CACHE_MAX_AGE_DAYS) -> None:
+    """
+    Drop cached TTS files that have not been used for `max_age_days`.
+    """
+    if not os.path.isdir(TTS_CACHE_DIR):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for entry in os.scandir(TTS_CACHE_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    if removed:
+        print(f"🧹 Pruned {removed} stale TTS cache files")
+
+def tts_to_file(text: str, voice_id: str, dst: str, max_retries: int = TTS_MAX_RETRIES) -> None:
     """
     Call ElevenLabs TTS API and save the result to a file with retry logic.
     """
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}?output_format={TTS_OUTPUT_FORMAT}"
     payload = {
         "text": text,
-        "model_id": "eleven_monolingual_v1",
-        "voice_settings": {"stability": 0.5, "similarity_boost": 0.8}
+        "model_id": TTS_MODEL_BASIC,
+        "voice_settings": TTS_SETTINGS_BASIC
     }
     
     try:
-        response = tts_api_call_with_retry(url, payload, HEADERS)
-        with open(dst, "wb") as f:
-            f.write(response.content)
+        response = tts_api_call_with_retry(url, payload, {**HEADERS, "Accept": "audio/mpeg"}, max_retries)
+        _atomic_write(dst, response.content)
     except Exception as e:
         print(f"Failed to generate TTS for text: {text[:50]}...")
         print(f"Error: {e}")
         raise
 
-def tts_with_timestamps(text: str, voice_id: str, tmp_dir: str) -> tuple[str, list[dict]]:
+class MissingTimestampsError(requests.exceptions.HTTPError):
+    """
+    The timestamped endpoint answered 200 but sent no alignment to caption with.
+    """
+
+def tts_with_timestamps(text: str, voice_id: str) -> tuple[str, list[dict]]:
     """
     Generate TTS with word-level timestamps using retry logic.
+    Results are cached by (voice, model, settings, text).
     """
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/with-timestamps"
+    audio_file = _tts_cache_path(voice_id, TTS_MODEL_TIMESTAMPS, TTS_SETTINGS_TIMESTAMPS, text)
+    cached = _load_cached_tts(audio_file)
+    if cached is not None:
+        print(f"♻️ Reusing cached TTS for: {text[:50]}")
+        return audio_file, cached
+
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/with-timestamps?output_format={TTS_OUTPUT_FORMAT}"
     payload = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.8,
-            "style": 0.0,
-            "use_speaker_boost": True
-        }
+        "model_id": TTS_MODEL_TIMESTAMPS,
+        "voice_settings": TTS_SETTINGS_TIMESTAMPS
     }
     
     try:
         response = tts_api_call_with_retry(url, payload, HEADERS)
-        result = response.json()
+        # Multi-MB body (base64 audio + per-character float arrays): parse in C
+        result = orjson.loads(response.content)
     except Exception as e:
         print(f"Failed to generate TTS with timestamps for text: {text[:50]}...")
         print(f"Error: {e}")
@@ -186,9 +491,6 @@ def tts_with_timestamps(text: str, voice_id: str, tmp_dir: str) -> tuple[str, li
 
     if "audio_base64" in result and "alignment" in result:
         audio_data = base64.b64decode(result["audio_base64"])
-        wav_file = os.path.join(tmp_dir, f"{hash(text)}.wav")
-        with open(wav_file, "wb") as f:
-            f.write(audio_data)
 
         # Assemble word timings
         word_timings = []
@@ -199,47 +501,76 @@ def tts_with_timestamps(text: str, voice_id: str, tmp_dir: str) -> tuple[str, li
             chars     = result["alignment"]["characters"]
             starts    = result["alignment"]["character_start_times_seconds"]
             ends      = result["alignment"]["character_end_times_seconds"]
-            curr_word = ""
-            w_start   = None
-
-            for i, ch in enumerate(chars):
-                if ch.isspace():
-                    if curr_word:
-                        word_timings.append({
-                            "word": curr_word,
-                            "start": w_start,
-                            "end": ends[i-1]
-                        })
-                        curr_word = ""
-                        w_start   = None
-                else:
-                    if w_start is None:
-                        w_start = starts[i]
-                    curr_word += ch
-
-            if curr_word:
-                word_timings.append({
-                    "word": curr_word,
-                    "start": w_start,
-                    "end": ends[-1]
-                })
-        return wav_file, word_timings
 
-    raise requests.exceptions.HTTPError("No timestamp data available")
+            # One alignment entry per character, so offsets into the joined
+            # string index straight into the timing arrays.
+            word_timings = [
+                {"word": m.group(), "start": starts[m.start()], "end": ends[m.end() - 1]}
+                for m in _WORD_SPAN.finditer("".join(chars))
+            ]
+        _store_cached_tts(audio_file, audio_data, word_timings)
+        return audio_file, word_timings
+
+    raise MissingTimestampsError("No timestamp data available")
+
+def _audio_duration(path: str) -> float:
+    """
+    Duration from the container metadata via ffprobe, without setting up a
+    MoviePy reader. Falls back to AudioFileClip if ffprobe is unavailable.
+    """
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        clip = AudioFileClip(path)
+        try:
+            return clip.duration
+        finally:
+            clip.close()
+
+def synthesize_turn(text: str, speaker: str, voice_id: str) -> tuple[str, list[dict]]:
+    """
+    Synthesize one dialog turn, falling back to plain TTS (one caption spanning
+    the whole clip) when the timestamped endpoint rejects the request or
+    returns no alignment.
+    """
+    try:
+        return tts_with_timestamps(text, voice_id)
+    except requests.exceptions.HTTPError as e:
+        # MissingTimestampsError carries no response; it is a usable answer
+        # without captions, not a transient failure
+        status = e.response.status_code if e.response is not None else None
+        if status is not None and (status == 429 or status >= 500):
+            # Retries on the timestamped endpoint are already spent; the
+            # basic endpoint is the same service and would only repeat them.
+            raise Exception(f"TTS processing failed for {speaker}: {e}") from e
+        print(f"TTS with timestamps failed for {speaker}, falling back to basic TTS: {e}")
+        audio_file = _tts_cache_path(voice_id, TTS_MODEL_BASIC, TTS_SETTINGS_BASIC, text)
+        try:
+            cached = _load_cached_tts(audio_file)
+            if cached is not None:
+                return audio_file, cached
+            # The failed request used one round trip of the retry budget
+            tts_to_file(text, voice_id, audio_file, max(0, TTS_MAX_RETRIES - 1))
+            dur = _audio_duration(audio_file)
+            wts = [{"word": text, "start": 0.0, "end": dur}]
+            _store_cached_tts(audio_file, None, wts)
+            return audio_file, wts
+        except Exception as tts_e:
+            raise Exception(f"TTS generation failed for {speaker}: {tts_e}") from tts_e
+    except Exception as e:
+        raise Exception(f"TTS processing failed for {speaker}: {e}") from e
 
 def build_caption_layers(sentence: str,
                          word_times: List[Dict],
-                         t_start: float) -> List[TextClip]:
+                         t_start: float) -> List[Overlay]:
     """
     Build subtitles that show one line at a time with karaoke highlighting.
     Lines replace each other in the same position.
     """
-    global FONT
-    try:
-        TextClip("T", font=FONT, fontsize=FONTSIZE).close()
-    except Exception:
-        FONT = "DejaVu-Sans-Bold"
-
     if not word_times:
         return []
 
@@ -272,37 +603,43 @@ def build_caption_layers(sentence: str,
     if not lines:
         return []
 
+    # cleaned TTS word -> ascending positions in word_times
+    tts_index: Dict[str, deque] = defaultdict(deque)
+    for i, word_timing in enumerate(word_times):
+        tts_index[_WORD_CLEAN.sub('', word_timing["word"].lower())].append(i)
+
     clips = []
     word_index = 0
     
-    caption_y = 1920 - CAP_Y_BASE
-    
     for line_num, line_words in enumerate(lines):
         line_word_times = []
         line_start_time = None
         line_end_time = None
         
         for line_word in line_words:
-            clean_line_word = re.sub(r'[^\w\']', '', line_word.lower())
+            clean_line_word = _WORD_CLEAN.sub('', line_word.lower())
             
+            # Next unconsumed TTS word with the same normalised spelling that
+            # lies at or after word_index (matching only ever moves forward).
             found_match = False
-            for i in range(word_index, len(word_times)):
-                clean_tts_word = re.sub(r'[^\w\']', '', word_times[i]["word"].lower())
-                if clean_tts_word == clean_line_word:
-                    word_timing = word_times[i]
-                    line_word_times.append({
-                        "word": line_word,
-                        "start": word_timing["start"],
-                        "end": word_timing["end"]
-                    })
-                    
-                    if line_start_time is None:
-                        line_start_time = word_timing["start"]
-                    line_end_time = word_timing["end"]
-                    
-                    word_index = i + 1
-                    found_match = True
-                    break
+            candidates = tts_index.get(clean_line_word)
+            while candidates and candidates[0] < word_index:
+                candidates.popleft()
+            if candidates:
+                i = candidates.popleft()
+                word_timing = word_times[i]
+                line_word_times.append({
+                    "word": line_word,
+                    "start": word_timing["start"],
+                    "end": word_timing["end"]
+                })
+                
+                if line_start_time is None:
+                    line_start_time = word_timing["start"]
+                line_end_time = word_timing["end"]
+                
+                word_index = i + 1
+                found_match = True
             
             if not found_match:
                 print(f"⚠️ Could not find timing for word: '{line_word}'")
@@ -311,80 +648,52 @@ def build_caption_layers(sentence: str,
             continue
         
         line_text = ' '.join(line_words)
-        line_duration = line_end_time - line_start_time
         
-        print(f"📝 Line {line_num + 1}: '{line_text}' from {line_start_time:.1f}s to {line_end_time:.1f}s at y={caption_y}")
+        print(f"📝 Line {line_num + 1}: '{line_text}' from {line_start_time:.1f}s to {line_end_time:.1f}s at y={CAPTION_Y}")
         
-        word_clips_info = []
-        total_width = 0
-        
-        for word_data in line_word_times:
-            word_clip = TextClip(word_data["word"], font=FONT, fontsize=FONTSIZE, method="label")
-            word_clips_info.append({
-                "word_data": word_data,
-                "width": word_clip.w
-            })
-            total_width += word_clip.w
-            word_clip.close()
-        
-        if len(word_clips_info) > 1:
-            space_clip = TextClip(" ", font=FONT, fontsize=FONTSIZE)
-            space_width = space_clip.w
-            total_width += space_width * (len(word_clips_info) - 1)
-            space_clip.close()
-        else:
-            space_width = 0
+        # Measure once (cached), then place with pure arithmetic.
+        widths = [_measure_word(wd["word"], FONT, FONTSIZE) for wd in line_word_times]
+        space_width = _space_width() if len(widths) > 1 else 0
+        total_width = sum(widths) + space_width * (len(widths) - 1)
         
         max_width = 900
         if total_width > max_width:
             print(f"⚠️ Line too wide ({total_width}px), will be clipped to {max_width}px")
         
-        line_start_x = (1080 - total_width) // 2
+        line_start_x = (CANVAS_W - total_width) // 2
         
-        line_start_x = max(40, min(line_start_x, 1040 - total_width))
+        line_start_x = max(CAP_X_MIN, min(line_start_x, CAP_X_MAX - total_width))
         
         print(f"📐 Line width: {total_width}px, start_x: {line_start_x}")
         
-        current_x = line_start_x
+        # x of each word: line start plus the widths and spaces before it
+        word_xs = line_start_x + np.concatenate(
+            ([0], np.cumsum(np.asarray(widths[:-1]) + space_width))
+        ).astype(int)
         
-        for i, word_info in enumerate(word_clips_info):
-            word_data = word_info["word_data"]
+        for word_data, word_x in zip(line_word_times, word_xs.tolist()):
             word_text = word_data["word"]
             word_start = word_data["start"]
             word_end = word_data["end"]
             
             try:
-                white_word = (TextClip(word_text, 
-                                     font=FONT, 
-                                     fontsize=FONTSIZE,
-                                     color="white",
-                                     stroke_width=STROKE, 
-                                     stroke_color="black",
-                                     method="label")
-                            .set_start(t_start + line_start_time)
-                            .set_duration(line_duration)
-                            .set_position((current_x, caption_y)))
+                white_word = Overlay(*_render_word(word_text, "white", FONT, FONTSIZE, STROKE),
+                                     x=word_x,
+                                     y=CAPTION_Y,
+                                     start=t_start + line_start_time,
+                                     end=t_start + line_end_time)
                 
                 clips.append(white_word)
                 
-                yellow_word = (TextClip(word_text, 
-                                      font=FONT, 
-                                      fontsize=FONTSIZE,
-                                      color="yellow",
-                                      stroke_width=STROKE, 
-                                      stroke_color="black",
-                                      method="label")
-                             .set_start(t_start + word_start)
-                             .set_duration(word_end - word_start)
-                             .set_position((current_x, caption_y)))
+                yellow_word = Overlay(*_render_word(word_text, "yellow", FONT, FONTSIZE, STROKE),
+                                      x=word_x,
+                                      y=CAPTION_Y,
+                                      start=t_start + word_start,
+                                      end=t_start + word_end)
                 
                 clips.append(yellow_word)
                 
-                current_x += word_info["width"]
-                if i < len(word_clips_info) - 1:
-                    current_x += space_width
-                
-                print(f"  📍 '{word_text}' at x={current_x - word_info['width']}")
+                print(f"  📍 '{word_text}' at x={word_x}")
                 
             except Exception as e:
                 print(f"❌ Error creating word clips for '{word_text}': {e}")
@@ -392,21 +701,218 @@ def build_caption_layers(sentence: str,
     print(f"✓ Created {len(clips)} caption clips for {len(lines)} lines")
     return clips
 
-def render_video(job: DialogJob) -> str:
+# (directory mtime, mp3 paths); rescanned only when the directory changes
+_MUSIC_TRACKS: tuple = (None, [])
+
+def _music_tracks() -> list:
+    global _MUSIC_TRACKS
+    try:
+        mtime = os.stat(AUDIO_ASSETS_DIR).st_mtime_ns
+    except OSError:
+        return []
+    if _MUSIC_TRACKS[0] != mtime:
+        _MUSIC_TRACKS = (mtime, glob.glob(os.path.join(AUDIO_ASSETS_DIR, "*.mp3")))
+    return _MUSIC_TRACKS[1]
+
+class TimelineCompositor:
+    """
+    Composites timed layers over a background frame by frame. Layers are
+    indexed into one-second buckets so each frame only visits the handful of
+    captions and sprites active at t, not every clip in the video.
+    """
+    BUCKET = 1.0
+
+    def __init__(self, bg, layers: List[Overlay]):
+        self.bg = bg
+        self.buckets: Dict[int, List[Overlay]] = defaultdict(list)
+        # Bucket lists keep the layer order, which is the z-order
+        for layer in layers:
+            first = int(layer.start // self.BUCKET)
+            last = int(layer.end // self.BUCKET)
+            for b in range(first, last + 1):
+                self.buckets[b].append(layer)
+
+    def make_frame(self, t: float) -> np.ndarray:
+        # Decoder frames may be shared buffers; blend into a private copy
+        frame = np.array(self.bg.get_frame(t), dtype=np.uint8)
+        for layer in self.buckets.get(int(t // self.BUCKET), ()):
+            if layer.start <= t < layer.end:
+                _blit(frame, layer)
+        return frame
+
+# ── background segments ─────────────────────────────────────────────────────
+# Seeking into the long background and cropping every frame in Python is paid
+# on every job. Instead, slice it once into a few pre-cropped 1080x1920
+# segments on disk and stream one of those per render.
+_BG_SEGMENT_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def _bg_source_info(path: str, mtime: float) -> tuple[float, str]:
+    """
+    Duration of the source background and a key naming its segments; `mtime`
+    is part of the cache key so a replaced source is re-sliced.
+    """
+    src = VideoFileClip(path, audio=False)
+    try:
+        duration = src.duration
+    finally:
+        src.close()
+    key = hashlib.blake2b(f"{path}|{mtime}".encode("utf-8"), digest_size=8).hexdigest()
+    return duration, key
+
+def _bg_segment(index: int) -> str:
+    """
+    Path of pre-cropped segment `index`, cutting it with ffmpeg on first use.
+    """
+    duration, key = _bg_source_info(LONG_BG_VIDEO, os.path.getmtime(LONG_BG_VIDEO))
+    path = os.path.join(BG_SEGMENT_DIR, f"bg_{key}_{index}.mp4")
+    if os.path.exists(path):
+        return path
+    with _BG_SEGMENT_LOCK:
+        if os.path.exists(path):
+            return path
+        os.makedirs(BG_SEGMENT_DIR, exist_ok=True)
+        span = max(0.0, duration - BG_SEGMENT_SECONDS)
+        start = span * index / max(1, BG_SEGMENTS - 1)
+        part = path + ".part.mp4"
+        subprocess.run(
+            [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+             "-ss", f"{start:.3f}", "-i", LONG_BG_VIDEO, "-t", str(BG_SEGMENT_SECONDS),
+             "-vf", f"crop=min({CANVAS_W}\\,iw):min({CANVAS_H}\\,ih)", "-an",
+             "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+             part],
+            check=True, capture_output=True,
+        )
+        os.replace(part, path)
+        print(f"🎞️ Cut background segment {index} at {start:.1f}s")
+    return path
+
+_VIDEO_CODEC = "libx264"
+
+def probe_video_encoder() -> None:
+    """
+    Pick the final encoder once at startup: h264_nvenc when VIDEO_ENCODER
+    allows it, a GPU is visible and ffmpeg was built with NVENC.
+    """
+    global _VIDEO_CODEC
+    if VIDEO_ENCODER != "auto":
+        _VIDEO_CODEC = VIDEO_ENCODER
+    elif shutil.which("nvidia-smi"):
+        try:
+            encoders = subprocess.run(
+                [get_setting("FFMPEG_BINARY"), "-hide_banner", "-encoders"],
+                check=True, capture_output=True, text=True, timeout=10,
+            ).stdout
+            if "h264_nvenc" in encoders:
+                _VIDEO_CODEC = "h264_nvenc"
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️ Could not list ffmpeg encoders, using libx264: {e}")
+    print(f"🎬 Video encoder: {_VIDEO_CODEC}")
+
+def _encode_settings() -> dict:
+    """
+    write_videofile arguments for the selected encoder.
+    """
+    common = [
+        "-movflags", "+faststart",  # Enable fast start for web streaming
+        "-pix_fmt", "yuv420p",      # Ensure compatibility with all players
+    ]
+    if _VIDEO_CODEC == "h264_nvenc":
+        return dict(
+            codec="h264_nvenc",
+            preset="p4",
+            ffmpeg_params=common + [
+                "-tune", "hq",
+                "-rc", "vbr",
+                "-cq", "23",
+                "-b:v", "5M",
+                "-maxrate", "7M",
+            ],
+        )
+    if _VIDEO_CODEC == "libsvtav1":
+        return dict(
+            codec="libsvtav1",
+            preset="12",
+            ffmpeg_params=common + [
+                "-crf", "30",
+                "-g", "48",                 # Keyframe every 2s at 24 fps
+            ],
+        )
+    return dict(
+        codec=_VIDEO_CODEC,
+        preset=VIDEO_PRESET,
+        # Split the cores between the jobs this worker renders at once
+        threads=max(1, (os.cpu_count() or 1) // RENDER_WORKERS),
+        ffmpeg_params=common + [
+            "-crf", "23",               # Good quality balance
+            "-maxrate", "5M",           # Limit bitrate for file size
+            "-bufsize", "10M"           # Buffer size
+        ],
+    )
+
+def background_clip(total: float):
+    """
+    A 1080x1920 background clip lasting `total` seconds from a random segment,
+    looped if the segment is shorter than the video.
+    """
+    try:
+        bg = VideoFileClip(_bg_segment(random.randrange(BG_SEGMENTS)), audio=False)
+    except Exception as e:
+        print(f"⚠️ Background segment unavailable, cropping the source directly: {e}")
+        # The reader seeks with -ss on the first frame past rs; skip the
+        # audio reader, the soundtrack is replaced anyway
+        bg = VideoFileClip(LONG_BG_VIDEO, audio=False)
+        mstart = max(0, bg.duration - total - 5)
+        rs = 0 if mstart <= 0 else random.uniform(0, mstart)
+        return (bg.subclip(rs, rs + total)
+                  .crop(width=CANVAS_W, height=CANVAS_H, x_center=bg.w/2, y_center=bg.h/2))
+    if bg.duration < total:
+        return video_loop(bg, duration=total)
+    rs = random.uniform(0, bg.duration - total)
+    return bg.subclip(rs, rs + total)
+
+def render_video(job: DialogJobMessage) -> str:
     """
     Render a dialog job into an MP4 file.
     """
     try:
-        r = redis.from_url(REDIS_URL, decode_responses=True)
+        r = _redis()
     except Exception as e:
         print(f"Warning: Redis connection failed, continuing without progress updates: {e}")
         r = None
     
-    def update_progress(progress: float, stage: str = ""):
+    # One job manager for the whole render; heartbeats reuse its connection.
+    heartbeat = None
+    if r:
+        try:
+            import sys
+            sys.path.append('/app/scaling-controller')
+            from job_manager import JobManager
+            from health_monitor import get_health_monitor
+            
+            health_monitor = get_health_monitor()
+            worker_id = health_monitor.worker_id if health_monitor else f"worker-{os.getpid()}"
+            
+            job_manager = JobManager(REDIS_URL)
+            if job_manager.connect_redis():
+                heartbeat = functools.partial(job_manager.update_job_heartbeat, job.job_id, worker_id)
+        except Exception as heartbeat_error:
+            print(f"Warning: Failed to set up job heartbeat: {heartbeat_error}")
+    
+    # Turns served from the TTS cache finish in milliseconds; write at most
+    # once per PROGRESS_INTERVAL unless the caller forces it.
+    last_write = 0.0
+    
+    def update_progress(progress: float, stage: str = "", force: bool = False):
         """
         Update rendering progress in Redis and job heartbeat
         """
+        nonlocal last_write
+        now = time.monotonic()
+        if not force and now - last_write < PROGRESS_INTERVAL:
+            return
         if r:
+            last_write = now
             try:
                 status_data = {
                     "job_id": job.job_id,
@@ -414,24 +920,16 @@ def render_video(job: DialogJob) -> str:
                     "progress": progress,
                     "stage": stage
                 }
-                r.set(job.job_id, json.dumps(status_data))
+                # Only these fields change between ticks
+                r.hset(job.job_id, mapping=status_data)
                 print(f"Progress: {progress:.1%} - {stage}")
                 
                 # Update job heartbeat
-                try:
-                    import sys
-                    sys.path.append('/app/scaling-controller')
-                    from job_manager import JobManager
-                    from health_monitor import get_health_monitor
-                    
-                    health_monitor = get_health_monitor()
-                    worker_id = health_monitor.worker_id if health_monitor else f"worker-{os.getpid()}"
-                    
-                    job_manager = JobManager(REDIS_URL)
-                    if job_manager.connect_redis():
-                        job_manager.update_job_heartbeat(job.job_id, worker_id)
-                except Exception as heartbeat_error:
-                    print(f"Warning: Failed to update job heartbeat: {heartbeat_error}")
+                if heartbeat:
+                    try:
+                        heartbeat()
+                    except Exception as heartbeat_error:
+                        print(f"Warning: Failed to update job heartbeat: {heartbeat_error}")
                     
             except Exception as e:
                 print(f"Warning: Failed to update progress: {e}")
@@ -440,10 +938,9 @@ def render_video(job: DialogJob) -> str:
     if not asset_map:
         raise ValueError(f"No assets found for theme: {job.character_theme}")
 
-    update_progress(0.15, "Initializing video rendering")
+    update_progress(0.15, "Initializing video rendering", force=True)
 
     with tempfile.TemporaryDirectory() as tmp:
-        bg       = VideoFileClip(LONG_BG_VIDEO)
         fps      = 24
         t_cursor = 0.0
         audio_parts = []
@@ -452,7 +949,8 @@ def render_video(job: DialogJob) -> str:
         total_turns = len(job.turns)
         update_progress(0.2, f"Processing {total_turns} dialog turns")
 
-        for i, turn in enumerate(job.turns):
+        turn_assets = []
+        for turn in job.turns:
             speaker_assets = None
             for key, assets in asset_map.items():
                 if key.lower() == turn.speaker.lower():
@@ -462,27 +960,35 @@ def render_video(job: DialogJob) -> str:
             if not speaker_assets:
                 available_speakers = list(asset_map.keys())
                 raise ValueError(f"Assets for speaker '{turn.speaker}' not found in theme '{job.character_theme}'. Available speakers: {available_speakers}")
-            
+            turn_assets.append(speaker_assets)
+
+        # TTS is network-bound: request every turn up front, consume in order.
+        tts_pool = ThreadPoolExecutor(max_workers=max(1, min(TTS_CONCURRENCY, total_turns)),
+                                      thread_name_prefix="tts")
+        try:
+            tts_futures = [
+                tts_pool.submit(synthesize_turn, turn.text, turn.speaker, assets["voice_id"])
+                for turn, assets in zip(job.turns, turn_assets)
+            ]
+        finally:
+            tts_pool.shutdown(wait=False)
+
+        for i, (turn, speaker_assets) in enumerate(zip(job.turns, turn_assets)):
             turn_progress = 0.2 + (i / total_turns) * 0.5
             update_progress(turn_progress, f"Generating speech for {turn.speaker} (turn {i+1}/{total_turns})")
             
             try:
-                wav, wts = tts_with_timestamps(turn.text, speaker_assets["voice_id"], tmp)
-            except requests.exceptions.HTTPError as e:
-                print(f"TTS with timestamps failed for {turn.speaker}, falling back to basic TTS: {e}")
-                wav = os.path.join(tmp, f"{hash(turn.text)}.wav")
-                try:
-                    tts_to_file(turn.text, speaker_assets["voice_id"], wav)
-                    dur = AudioFileClip(wav).duration
-                    wts = [{"word": turn.text, "start": 0.0, "end": dur}]
-                except Exception as tts_e:
-                    raise Exception(f"TTS generation failed for {turn.speaker}: {tts_e}") from tts_e
-            except Exception as e:
-                raise Exception(f"TTS processing failed for {turn.speaker}: {e}") from e
+                audio_file, wts = tts_futures[i].result()
+            except BaseException:
+                # Don't leave this job's TTS requests running after it has failed.
+                for pending in tts_futures[i + 1:]:
+                    pending.cancel()
+                futures_wait(tts_futures)
+                raise
 
-            raw = AudioFileClip(wav)
-            if raw.nchannels == 1:
-                raw = raw.set_channels(2)
+            # MoviePy's reader decodes with "-ac 2", so mono TTS is already
+            # stereo by the time it reaches numpy
+            raw = AudioFileClip(audio_file)
             
             if turn.speaker.lower() in ['stewie', 'morty']:
                 raw = raw.volumex(1.25)
@@ -491,15 +997,13 @@ def render_video(job: DialogJob) -> str:
             clip = raw.set_start(t_cursor)
             audio_parts.append(clip)
 
-            img_path = os.path.join(os.path.dirname(__file__), "assets", speaker_assets["image"])
+            img_path = os.path.join(CHARACTER_ASSETS_DIR, speaker_assets["image"])
             
-            sprite = (
-                ImageClip(img_path)
-                .resize(height=CHAR_HEIGHT)
-                .set_duration(raw.duration)
-                .set_start(t_cursor)
-                .set_position((30, 1920-CHAR_HEIGHT-150))
-            )
+            sprite = Overlay(*_sprite_bitmap(img_path, CHAR_HEIGHT),
+                             x=SPRITE_X,
+                             y=SPRITE_Y,
+                             start=t_cursor,
+                             end=t_cursor + raw.duration)
             visuals.append(sprite)
             
             print(f"🐰 Added {turn.speaker} static sprite: start={t_cursor:.1f}s, duration={raw.duration:.1f}s")
@@ -512,47 +1016,36 @@ def render_video(job: DialogJob) -> str:
         if not audio_parts:
             raise ValueError("No audio to render")
 
-        update_progress(0.75, "Compositing video and audio")
+        update_progress(0.75, "Compositing video and audio", force=True)
         total = t_cursor
-        mstart = max(0, bg.duration - total - 5)
-        rs = 0 if mstart <= 0 else random.uniform(0, mstart)
-        bg = (
-            bg.subclip(rs, rs + total)
-              .crop(width=1080, height=1920, x_center=bg.w/2, y_center=bg.h/2)
-        )
+        bg = background_clip(total)
 
         narration = CompositeAudioClip(audio_parts)
-        mp3s = glob.glob(os.path.join(AUDIO_ASSETS_DIR, "*.mp3"))
+        mp3s = _music_tracks()
         if mp3s:
             music = audio_loop(AudioFileClip(mp3s[0]), duration=total).volumex(0.1)
             final_audio = CompositeAudioClip([narration, music])
         else:
             final_audio = narration
 
-        video = CompositeVideoClip([bg] + visuals).set_audio(final_audio)
+        compositor = TimelineCompositor(bg, visuals)
+        video = VideoClip(compositor.make_frame, duration=total).set_audio(final_audio)
         os.makedirs(VIDEO_OUT_DIR, exist_ok=True)
         out = os.path.join(VIDEO_OUT_DIR, f"{job.job_id}.mp4")
         
         video.write_videofile(
             out, 
             fps=fps, 
-            codec="libx264",
             audio_codec="aac",
-            temp_audiofile="temp-audio.m4a",
+            # Encoded once to AAC in the job's tmp dir, then stream-copied into the mux
+            audio_bitrate="128k",
+            temp_audiofile=os.path.join(tmp, "audio.m4a"),
             remove_temp=True,
-            preset="medium",
-            ffmpeg_params=[
-                "-movflags", "+faststart",  # Enable fast start for web streaming
-                "-pix_fmt", "yuv420p",      # Ensure compatibility with all players
-                "-crf", "23",               # Good quality balance
-                "-maxrate", "5M",           # Limit bitrate for file size
-                "-bufsize", "10M"           # Buffer size
-            ]
+            **_encode_settings()
         )
 
         video.close(); bg.close()
         for c in audio_parts: c.close()
-        for c in visuals:     c.close()
         return out
 
 def increment_video_count_postgres():
@@ -568,21 +1061,107 @@ def increment_video_count_postgres():
     except Exception as e:
         print(f"⚠️ Error incrementing video count in Postgres: {e}")
 
-def on_message(ch, method, props, body):
+# Renders run on a small pool so TTS round-trips of one job overlap the
+# encode of another; pika stays on the main thread and only acks.
+_render_pool: Optional[ThreadPoolExecutor] = None
+_in_flight: set = set()
+# Deliveries waiting for a free capacity slot. Only touched from the
+# connection thread, like the channel they belong to.
+_held: deque = deque()
+
+def on_message(ch, method, props, body, publish_ch=None):
     from health_monitor import get_health_monitor
-    import sys
-    sys.path.append('/app/scaling-controller')
-    from job_manager import JobManager
     
     health_monitor = get_health_monitor()
     
-    # Check if worker should accept new jobs
-    if health_monitor and not health_monitor.should_accept_new_jobs():
-        print("🛑 Worker is shutting down, rejecting new job")
+    # Only hand the job back when this worker can't take it at all; a nack
+    # for capacity would just be redelivered to us straight away
+    if health_monitor and not health_monitor.is_accepting_jobs():
+        print("🛑 Worker is shutting down or unhealthy, rejecting new job")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
         return
     
-    job = DialogJob.model_validate_json(body)
+    _held.append((ch, method, body, publish_ch))
+    dispatch_held()
+    if _held:
+        print(f"⏸️ At capacity, holding {len(_held)} job(s) until a render finishes")
+
+def dispatch_held() -> None:
+    """
+    Start held deliveries while the worker has free capacity. Runs on the
+    connection thread: on each delivery, after each ack, and once per poll
+    so a raised concurrent job limit is picked up.
+    """
+    from health_monitor import get_health_monitor
+    
+    health_monitor = get_health_monitor()
+    while _held:
+        if health_monitor and not (health_monitor.is_accepting_jobs()
+                                   and health_monitor.has_free_capacity()):
+            return
+        _start_job(*_held.popleft())
+
+def release_held() -> None:
+    """
+    Requeue deliveries that never started, e.g. on shutdown.
+    """
+    while _held:
+        ch, method, _, _ = _held.popleft()
+        if ch.is_open:
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+
+def _start_job(ch, method, body, publish_ch=None):
+    from health_monitor import get_health_monitor
+    
+    health_monitor = get_health_monitor()
+    
+    job = dialog_job_decoder.decode(body)
+    
+    # Count the job against capacity before the next delivery is checked
+    if health_monitor:
+        health_monitor.set_current_job(job.job_id)
+    
+    delivery_tag = method.delivery_tag
+    connection = ch.connection
+    _in_flight.add(delivery_tag)
+    
+    def ack(publish_body):
+        _in_flight.discard(delivery_tag)
+        if publish_body and publish_ch is not None:
+            try:
+                publish_ch.basic_publish(exchange="", routing_key=PUBLISH_QUEUE,
+                                         body=publish_body,
+                                         properties=pika.BasicProperties(delivery_mode=2))
+                print(f"✅ Video published to publisher queue for {job.job_id}")
+            except Exception as pub_e:
+                print(f"⚠️ Publisher queue failed (video already completed): {pub_e}")
+        if ch.is_open:
+            ch.basic_ack(delivery_tag=delivery_tag)
+        dispatch_held()
+    
+    def on_done(future):
+        if future.exception() is not None:
+            print(f"[✗] Unhandled error processing {job.job_id}: {future.exception()}")
+        # pika is not thread-safe: hand the ack back to the connection thread
+        try:
+            publish_body = future.result() if future.exception() is None else None
+            connection.add_callback_threadsafe(functools.partial(ack, publish_body))
+        except Exception as e:
+            print(f"⚠️ Could not ack {job.job_id}, it will be redelivered: {e}")
+    
+    _render_pool.submit(process_job, job).add_done_callback(on_done)
+
+def process_job(job: DialogJobMessage) -> Optional[str]:
+    """
+    Render one job and record its outcome. Returns the RenderJob message to
+    publish, if any.
+    """
+    from health_monitor import get_health_monitor
+    import sys
+    sys.path.append('/app/scaling-controller')
+    from job_manager import JobManager
+    
+    health_monitor = get_health_monitor()
     video_generation_successful = False
     video_path = None
     
@@ -599,21 +1178,17 @@ def on_message(ch, method, props, body):
         job_manager.assign_job(job.job_id, worker_id)
         job_manager.start_job(job.job_id, worker_id)
     
-    # Set current job in health monitor
-    if health_monitor:
-        health_monitor.set_current_job(job.job_id)
-    
     try:
         print(f"🐰 Rendering video for {job.job_id}…")
         
         try:
-            r = redis.from_url(REDIS_URL, decode_responses=True)
+            r = _redis()
             status_data = {
                 "job_id": job.job_id,
                 "status": "rendering",
                 "progress": 0.1
             }
-            r.set(job.job_id, json.dumps(status_data))
+            _replace_job_status(r, job.job_id, status_data)
             print(f"Updated Redis status to 'rendering' for {job.job_id}")
             
             # Update user video status to rendering
@@ -627,13 +1202,13 @@ def on_message(ch, method, props, body):
             raise Exception("Video file not created properly or is too small")
         
         try:
-            r = redis.from_url(REDIS_URL, decode_responses=True)
+            r = _redis()
             status_data = {
                 "job_id": job.job_id,
                 "status": "done",
                 "download_url": f"/api/videos/{job.job_id}/file"
             }
-            r.set(job.job_id, json.dumps(status_data))
+            _replace_job_status(r, job.job_id, status_data)
             print(f"Updated Redis status to 'done' for {job.job_id}")
             
             # Update user video status to done
@@ -668,13 +1243,13 @@ def on_message(ch, method, props, body):
         update_user_video_status(job.job_id, "error", error_message=str(e))
         
         try:
-            r = redis.from_url(REDIS_URL, decode_responses=True)
+            r = _redis()
             error_status = {
                 "job_id": job.job_id,
                 "status": "error",
                 "error_msg": f"Video generation failed: {str(e)}"
             }
-            r.set(job.job_id, json.dumps(error_status))
+            _replace_job_status(r, job.job_id, error_status)
             print(f"Updated Redis status to 'error' for {job.job_id}")
         except Exception as redis_e:
             print(f"Warning: Failed to update Redis error status: {redis_e}")
@@ -686,26 +1261,12 @@ def on_message(ch, method, props, body):
                            storage_path=video_path).model_dump_json()
             
             if ENABLE_PUBLISHER:
-                try:
-                    if not RABBIT_URL:
-                        raise ValueError("RABBIT_URL is not configured")
-                    conn = pika.BlockingConnection(pika.URLParameters(RABBIT_URL))
-                    chan = conn.channel()
-                    chan.queue_declare(queue=PUBLISH_QUEUE, durable=True)
-                    chan.basic_publish(exchange="", routing_key=PUBLISH_QUEUE,
-                                      body=msg,
-                                      properties=pika.BasicProperties(delivery_mode=2))
-                    conn.close()
-                    print(f"✅ Video published to publisher queue: {video_path}")
-                except Exception as pub_e:
-                    print(f"⚠️ Publisher queue failed (video already completed): {pub_e}")
-            else:
-                print(f"✅ Video ready (publisher disabled): {video_path}")
+                # Published on the consumer connection just before the ack
+                return msg
+            print(f"✅ Video ready (publisher disabled): {video_path}")
         except Exception as post_e:
             print(f"⚠️ Post-processing failed (video already completed): {post_e}")
-    
-    # Acknowledge message processing
-    ch.basic_ack(delivery_tag=method.delivery_tag)
+    return None
 
 def main():
     from health_monitor import initialize_health_monitor
@@ -724,6 +1285,15 @@ def main():
     else:
         print("⚠️ REDIS_URL not configured, health monitoring disabled")
     
+    prune_tts_cache()
+    
+    probe_caption_font()
+    
+    probe_video_encoder()
+    
+    global _render_pool
+    _render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+    
     # Initialize job manager
     job_manager = None
     if REDIS_URL:
@@ -751,19 +1321,35 @@ def main():
                 connection_params.retry_delay = 2
                 
                 conn = pika.BlockingConnection(connection_params)
+                # Delivery tags from a dropped channel can never be acked
+                _in_flight.clear()
+                _held.clear()
                 ch = conn.channel()
                 ch.queue_declare(queue=VIDEO_QUEUE, durable=True)
-                ch.basic_qos(prefetch_count=1)
-                ch.basic_consume(queue=VIDEO_QUEUE, on_message_callback=on_message, auto_ack=False)
+                ch.basic_qos(prefetch_count=PREFETCH_COUNT)
+                # Long-lived publish channel on the same connection; used from
+                # the connection thread only, right before each ack
+                publish_ch = None
+                if ENABLE_PUBLISHER:
+                    publish_ch = conn.channel()
+                    publish_ch.queue_declare(queue=PUBLISH_QUEUE, durable=True)
+                ch.basic_consume(queue=VIDEO_QUEUE,
+                                 on_message_callback=functools.partial(on_message, publish_ch=publish_ch),
+                                 auto_ack=False)
                 print("🚀 Video Creator waiting for scripts…")
                 
                 # Start consuming with timeout to check for shutdown
                 while True:
                     try:
                         conn.process_data_events(time_limit=1)
+                        dispatch_held()
                         if health_monitor and health_monitor.is_shutdown_requested():
                             print("🛑 Graceful shutdown requested, stopping message consumption...")
                             ch.stop_consuming()
+                            release_held()
+                            # Keep servicing the connection so in-flight renders get acked
+                            while _in_flight:
+                                conn.process_data_events(time_limit=1)
                             break
                     except Exception as e:
                         print(f"⚠️ Error processing messages: {e}")
@@ -797,6 +1383,7 @@ def main():
                     health_monitor.set_health_status(True, "Reconnected")
     finally:
         # Clean shutdown
+        _render_pool.shutdown(wait=True)
         if health_monitor:
             health_monitor.stop()
         print("🏁 Video Creator shutdown complete")